@@ -1,12 +1,18 @@
 import pandas as pd
 from glob import glob
 
-# Load and combine all trials
-files = sorted(glob("*_energy_log.csv"))
+# Load and combine all trials (CSV logs, or Parquet / Arrow IPC parts written
+# with LOG_FORMAT=parquet / LOG_FORMAT=arrow)
+files = (
+    sorted(glob("*_energy_log.csv"))
+    + sorted(glob("*_energy_log-*.parquet"))
+    + sorted(glob("*_energy_log-*.arrow"))
+)
+readers = {".parquet": pd.read_parquet, ".arrow": pd.read_feather}
 dfs = []
 
 for file in files:
-    df = pd.read_csv(file)
+    df = readers.get(file[file.rfind(".") :], pd.read_csv)(file)
     df.columns = [col.strip().lower() for col in df.columns]
     df["timestamp"] = pd.to_datetime(df["timestamp"], errors="raise")
     dfs.append(df)
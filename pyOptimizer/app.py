@@ -9,7 +9,8 @@ from config import config as application_config
 from metrics import k8s
 from metrics.core import MetricsCore
 from metrics.logger import ExperimentLogger
-from optimizer.core import HeuristicScheduler
+from optimizer.core import HeuristicScheduler, build_association_index
+from optimizer.vectorized import VectorizedScheduler
 
 load_dotenv()
 # Initialize Flask app
@@ -17,10 +18,22 @@ app = Flask(__name__)
 
 KUBE_CONFIG = os.getenv("KUBE_CONFIG", "~/.kube/config")
 SERVICE_NAME = os.getenv("SERVICE_NAME", "autocar")
+USE_INFORMERS = os.getenv("USE_INFORMERS", "true").lower() == "true"
+# "heuristic" (per-node loop) or "vectorized" (NumPy), same placements
+SCHEDULER_ENGINE = os.getenv("SCHEDULER_ENGINE", "heuristic")
+
+SCHEDULERS = {
+    "heuristic": HeuristicScheduler,
+    "vectorized": VectorizedScheduler,
+}
+Scheduler = SCHEDULERS[SCHEDULER_ENGINE]
 
 config = application_config.get(SERVICE_NAME)
+association_index = build_association_index(config["association_graph"])
 metrics_core = MetricsCore(config=config)
-k8s_manager = k8s.KubernetesManager(config_file=KUBE_CONFIG)
+k8s_manager = k8s.KubernetesManager(
+    config_file=KUBE_CONFIG, use_informers=USE_INFORMERS
+)
 logger = ExperimentLogger()
 
 
@@ -61,7 +74,7 @@ def get_node():
 
     smart_cfg = config
 
-    scheduler = HeuristicScheduler(
+    scheduler = Scheduler(
         placement_map=placement_map,
         nodes=nodes,
         config={
@@ -71,6 +84,7 @@ def get_node():
             "latency_weight": smart_cfg["alpha"],
             "energy_weight": smart_cfg["beta"],
             "association_graph": smart_cfg["association_graph"],
+            "association_index": association_index,
         },
     )
 
@@ -85,10 +99,53 @@ def get_node():
     )
 
 
+@app.route("/get_nodes")
+def get_nodes():
+    """
+    Places a batch of pods with one scheduler, e.g. a Knative scale-out.
+    Query args: pods=<pod1>,<pod2>,... and nodes=<node1>,<node2>,...
+    """
+    pod_names = [p for p in request.args.get("pods", "").split(",") if p]
+    nodes = request.args.get("nodes", "").split(",")
+
+    service_names = [extract_service_name(pod) for pod in pod_names]
+    if not service_names or any(s not in config["workloads"] for s in service_names):
+        return jsonify({"error": "Missing or unknown pod names provided"}), 400
+
+    placement_map = k8s_manager.get_pod_mapping(services=config["workloads"])
+
+    service_latency = {
+        service: metrics_core.collect_latency_metrics(service)
+        for service in set(service_names)
+    }
+
+    scheduler = Scheduler(
+        placement_map=placement_map,
+        nodes=nodes,
+        config={
+            "service_latency": service_latency,
+            "traffic_weight": config["gamma"],
+            "latency_weight": config["alpha"],
+            "energy_weight": config["beta"],
+            "association_graph": config["association_graph"],
+            "association_index": association_index,
+        },
+    )
+
+    placements = scheduler.place_many(service_names, pod_names)
+    timestamp = datetime.datetime.now().isoformat()
+    results = []
+    for pod, service, (node, score) in zip(pod_names, service_names, placements):
+        print(f"Placing {service} ({pod}) on {node} with score {score}")
+        results.append({"pod": pod, "service": service, "node": node, "score": score})
+
+    return jsonify({"placements": results, "timestamp": timestamp})
+
+
 @app.route("/get_dashboard_data")
 def dashboard():
     """
-    Returns current placement and energy metrics, and logs them to CSV.
+    Returns current placement and energy metrics, and persists them to the metrics DB.
     """
     placement_map = k8s_manager.get_pod_mapping(services=config["workloads"])
     ip_mapping = k8s_manager.get_internal_ip_mapping()
@@ -124,9 +181,22 @@ def dashboard():
             }
         )
 
+    metrics_core.db.write_energy_rows(node_rows + pod_rows)
+
     return jsonify({"metrics": energy, "mapping": placement_map})
 
 
+@app.route("/prometheus_stats")
+def prometheus_stats():
+    """
+    Returns Prometheus client counters, including connection reuse,
+    and hit/miss counters of the scheduler metrics cache.
+    """
+    stats = metrics_core.prom.connection_stats()
+    stats["cache"] = dict(metrics_core.cache.stats)
+    return jsonify(stats)
+
+
 @app.route("/ui")
 def dashboard_ui():
     return render_template("dashboard.html")
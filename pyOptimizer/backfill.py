@@ -0,0 +1,141 @@
+"""
+Backfill energy logs for a past experiment window from Prometheus.
+
+Pulls the whole window with a handful of /api/v1/query_range calls and writes
+<prefix>_node_log.csv and <prefix>_pod_log.csv in the schema data_processing
+expects, instead of polling instant queries during the run.
+
+Example:
+    python backfill.py --start 2025-06-02T20:13:57 --end 2025-06-02T20:16:57 \\
+        --step 5 --prefix t1 --node worker-1=10.0.0.11 --node worker-2=10.0.0.12
+"""
+
+import argparse
+import datetime
+import os
+
+from config import config as application_config
+from metrics.core import PROM_MAX_RETRIES, PROM_QUERY_TIMEOUT, PROM_URL
+from metrics.logger import ExperimentLogger
+from metrics.metrics import MetricsCollector
+from metrics.prometheus import PrometheusClient
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "autocar")
+KUBE_CONFIG = os.getenv("KUBE_CONFIG", "~/.kube/config")
+
+
+def parse_time(value: str) -> float:
+    """Accepts unix seconds or an ISO 8601 timestamp (local time if naive)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def parse_nodes(values: list[str]) -> dict:
+    ip_mapping = {}
+    for value in values:
+        name, _, ip = value.partition("=")
+        if not ip:
+            raise SystemExit(f"--node expects name=ip, got '{value}'")
+        ip_mapping[name] = ip
+    return ip_mapping
+
+
+def is_workload_pod(pod: str, workloads: list[str]) -> bool:
+    return any(pod.startswith(f"{workload}-") for workload in workloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--start", required=True, help="unix seconds or ISO time")
+    parser.add_argument("--end", required=True, help="unix seconds or ISO time")
+    parser.add_argument("--step", type=float, default=5, help="seconds per sample")
+    parser.add_argument("--prefix", required=True, help="e.g. t1 -> t1_node_log.csv")
+    parser.add_argument(
+        "--node",
+        action="append",
+        default=[],
+        help="name=internal_ip, repeatable; defaults to the cluster's current nodes",
+    )
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    start, end = parse_time(args.start), parse_time(args.end)
+    node_file = f"{args.prefix}_node_log.csv"
+    pod_file = f"{args.prefix}_pod_log.csv"
+    for filename in (node_file, pod_file):
+        if os.path.exists(filename):
+            if not args.overwrite:
+                raise SystemExit(f"{filename} exists, pass --overwrite to replace it")
+            os.remove(filename)
+
+    config = application_config.get(SERVICE_NAME)
+    if args.node:
+        ip_mapping = parse_nodes(args.node)
+    else:
+        from metrics.k8s import KubernetesManager
+
+        ip_mapping = KubernetesManager(
+            config_file=KUBE_CONFIG
+        ).get_internal_ip_mapping()
+
+    prom = PrometheusClient(
+        PROM_URL, timeout=PROM_QUERY_TIMEOUT, max_retries=PROM_MAX_RETRIES
+    )
+    energy = MetricsCollector(prom=prom).get_energy_metrics_range(
+        ip_mapping, start, end, args.step
+    )
+
+    def iso(ts):
+        return datetime.datetime.fromtimestamp(ts).isoformat()
+
+    node_rows = [
+        {
+            "timestamp": iso(row["timestamp"]),
+            "scope": "node",
+            "name": row["node"],
+            "cpu_util": row["cpu_util"],
+            "power": row["power"],
+            "memory_util": row["memory_util"],
+        }
+        for row in sorted(energy["node_metrics"], key=lambda r: r["timestamp"])
+    ]
+    pod_rows = [
+        {
+            "timestamp": iso(row["timestamp"]),
+            "scope": "pod",
+            "name": row["pod"],
+            "node": row["node"],
+            "cpu_util": row["cpu_util"],
+            "power": row["power"],
+            "memory_mib": row["memory_mib"],
+        }
+        for row in sorted(energy["pod_metrics"], key=lambda r: r["timestamp"])
+        if is_workload_pod(row["pod"], config["workloads"])
+    ]
+
+    unmapped = {row["name"] for row in pod_rows if not row["node"]}
+    if unmapped:
+        print(
+            f"[Backfill] Warning: no kube_pod_info node for {len(unmapped)} pod(s): "
+            f"{', '.join(sorted(unmapped))}"
+        )
+
+    logger = ExperimentLogger(flush_rows=10000)
+    if node_rows:
+        logger.log(node_rows, filename=node_file)
+    if pod_rows:
+        logger.log(pod_rows, filename=pod_file)
+    logger.close()
+
+    stats = prom.connection_stats()
+    print(
+        f"[Backfill] {len(node_rows)} node rows -> {node_file}, "
+        f"{len(pod_rows)} pod rows -> {pod_file} "
+        f"({stats['queries']} Prometheus queries)"
+    )
+
+
+if __name__ == "__main__":
+    main()
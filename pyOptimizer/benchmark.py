@@ -0,0 +1,200 @@
+"""
+Scheduler benchmark on synthetic clusters.
+
+Generates clusters and association graphs shaped like config.py, places a
+stream of pods with each scheduler engine and reports placement latency
+percentiles, throughput, inter-node traffic and activated node counts as JSON.
+
+Example:
+    python benchmark.py --nodes 3 100 1000 --services 5 50 500 --output bench.json
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+
+from optimizer.core import HeuristicScheduler, build_association_index
+from optimizer.vectorized import VectorizedScheduler
+
+ENGINES = {
+    "heuristic": HeuristicScheduler,
+    "vectorized": VectorizedScheduler,
+}
+
+
+def generate_cluster(n_nodes, n_services, rng, placed_fraction=0.5):
+    """
+    Returns (nodes, services, association_graph, placement_map, node_latency).
+    """
+    nodes = [f"worker-{i + 1}" for i in range(n_nodes)]
+    services = [f"s{i + 1}-svc" for i in range(n_services)]
+
+    association_graph = {}
+    for src in services:
+        for _ in range(rng.randint(0, 2)):
+            dst = rng.choice(services)
+            colocated_latency = round(rng.uniform(0.8, 2.0), 3)
+            association_graph[(src, dst)] = {
+                "traffic_cost": 0 if src == dst else int(rng.lognormvariate(14, 1.5)),
+                "colocated_latency": colocated_latency,
+                "remote_latency": (
+                    colocated_latency
+                    if src == dst
+                    else round(colocated_latency + rng.uniform(0.5, 10.0), 3)
+                ),
+            }
+
+    placement_map = {}
+    for service in services:
+        if rng.random() < placed_fraction:
+            placement_map[service] = {}
+            for _ in range(rng.randint(1, 3)):
+                node = rng.choice(nodes)
+                pods = placement_map[service].setdefault(node, [])
+                pods.append(f"{service}-{len(pods)}")
+
+    node_latency = {
+        node: rng.uniform(1.0, 50.0)
+        for node in rng.sample(nodes, k=max(1, n_nodes // 4))
+    }
+
+    return nodes, services, association_graph, placement_map, node_latency
+
+
+def compute_inter_node_traffic(placement_map, association_graph):
+    """Same accounting as compute_inter_node_traffic in logger.py."""
+    total_traffic = 0
+    for (src, dst), meta in association_graph.items():
+        src_nodes = placement_map.get(src, {})
+        dst_nodes = placement_map.get(dst, {})
+        for src_node in src_nodes:
+            for dst_node in dst_nodes:
+                if src_node != dst_node:
+                    total_traffic += meta.get("traffic_cost", 0.0)
+                    break
+    return total_traffic
+
+
+def count_active_nodes(placement_map):
+    return len(
+        {
+            node
+            for node_pods in placement_map.values()
+            for node, pods in node_pods.items()
+            if pods
+        }
+    )
+
+
+def percentile(sorted_vals, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_vals:
+        return None
+    rank = max(0, min(len(sorted_vals) - 1, round(q / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[rank]
+
+
+def run_case(engine, n_nodes, n_services, n_pods, seed):
+    rng = random.Random(seed)
+    nodes, services, graph, placement_map, node_latency = generate_cluster(
+        n_nodes, n_services, rng
+    )
+    pods_to_place = [rng.choice(services) for _ in range(n_pods)]
+
+    scheduler = ENGINES[engine](
+        placement_map=copy.deepcopy(placement_map),
+        nodes=nodes,
+        config={
+            "node_latency": node_latency,
+            "traffic_weight": 0.2,
+            "latency_weight": 0.5,
+            "energy_weight": 0.3,
+            "association_graph": graph,
+            "association_index": build_association_index(graph),
+        },
+    )
+
+    latencies = []
+    start = time.perf_counter()
+    for service in pods_to_place:
+        t0 = time.perf_counter()
+        node, _ = scheduler.place(service)
+        latencies.append(time.perf_counter() - t0)
+        if node is not None:
+            scheduler.record_placement(service, node)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "engine": engine,
+        "nodes": n_nodes,
+        "services": n_services,
+        "edges": len(graph),
+        "pods_placed": n_pods,
+        "seed": seed,
+        "total_seconds": round(total, 6),
+        "throughput_pods_per_second": round(n_pods / total, 2) if total else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 4),
+            "p50": round(percentile(latencies, 50) * 1000, 4),
+            "p95": round(percentile(latencies, 95) * 1000, 4),
+            "p99": round(percentile(latencies, 99) * 1000, 4),
+            "max": round(latencies[-1] * 1000, 4),
+        },
+        "inter_node_traffic_before": compute_inter_node_traffic(placement_map, graph),
+        "inter_node_traffic_after": compute_inter_node_traffic(
+            scheduler.placement_map, graph
+        ),
+        "active_nodes_before": count_active_nodes(placement_map),
+        "active_nodes_after": count_active_nodes(scheduler.placement_map),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[3, 10, 100, 1000])
+    parser.add_argument("--services", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--pods", type=int, default=50, help="pods placed per case")
+    parser.add_argument(
+        "--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES)
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for n_nodes in args.nodes:
+        for n_services in args.services:
+            for engine in args.engines:
+                result = run_case(engine, n_nodes, n_services, args.pods, args.seed)
+                print(
+                    f"[Bench] {engine:10s} nodes={n_nodes:<5d} services={n_services:<4d} "
+                    f"p50={result['latency_ms']['p50']}ms "
+                    f"p99={result['latency_ms']['p99']}ms "
+                    f"throughput={result['throughput_pods_per_second']}/s",
+                    file=sys.stderr,
+                    flush=True,
+                )
+                results.append(result)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pods_per_case": args.pods,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
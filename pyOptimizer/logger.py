@@ -1,26 +1,36 @@
 import os
-import time
 import datetime
 
 from config import config as application_config
 from metrics.core import MetricsCore
 from metrics.k8s import KubernetesManager
 from metrics.logger import ExperimentLogger
+from metrics.sampler import PeriodicSampler
 
 SERVICE_NAME = os.getenv("SERVICE_NAME", "autocar")
 KUBE_CONFIG = os.getenv("KUBE_CONFIG", "~/.kube/config")
-LOG_INTERVAL = int(os.getenv("LOG_INTERVAL", 5))  # seconds
+LOG_INTERVAL = float(os.getenv("LOG_INTERVAL", 5))  # seconds
 LOG_DURATION = int(os.getenv("LOG_DURATION", 180))  # seconds
+USE_INFORMERS = os.getenv("USE_INFORMERS", "true").lower() == "true"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "csv")  # csv, parquet or arrow
+LOG_FLUSH_ROWS = int(os.getenv("LOG_FLUSH_ROWS", 1000))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 10))  # seconds
+LOG_ROTATE_ROWS = int(os.getenv("LOG_ROTATE_ROWS", 0)) or None  # columnar parts
 
 config = application_config.get(SERVICE_NAME)
 metrics_core = MetricsCore(config=config)
-k8s_manager = KubernetesManager(config_file=KUBE_CONFIG)
-logger = ExperimentLogger()
+k8s_manager = KubernetesManager(config_file=KUBE_CONFIG, use_informers=USE_INFORMERS)
+logger = ExperimentLogger(
+    format=LOG_FORMAT,
+    flush_rows=LOG_FLUSH_ROWS,
+    flush_interval=LOG_FLUSH_INTERVAL,
+    rotate_rows=LOG_ROTATE_ROWS,
+)
 
 
-def get_node_energy_snapshot(placement_map, ip_mapping):
+def get_node_energy_snapshot(placement_map, ip_mapping, timestamp=None):
     energy = metrics_core.collect_dashboard_energy_metrics(placement_map, ip_mapping)
-    timestamp = datetime.datetime.now().isoformat()
+    timestamp = timestamp or datetime.datetime.now().isoformat()
     node_energy_rows = []
     active_nodes = set()
     for node_dict in placement_map.values():
@@ -69,21 +79,40 @@ def compute_inter_node_traffic(placement_map):
     return total_traffic
 
 
-# Logging loop
-end_time = time.time() + LOG_DURATION
-while time.time() < end_time:
+def collect_sample(tick_time):
     placement_map = k8s_manager.get_pod_mapping(services=config["workloads"])
     ip_mapping = k8s_manager.get_internal_ip_mapping()
 
-    node_energy_rows = get_node_energy_snapshot(placement_map, ip_mapping)
+    # Rows carry the scheduled tick time so samples are evenly spaced
+    timestamp = tick_time.isoformat()
+    node_energy_rows = get_node_energy_snapshot(placement_map, ip_mapping, timestamp)
     inter_node_traffic = compute_inter_node_traffic(placement_map)
 
     meta_row = {
-        "timestamp": datetime.datetime.now().isoformat(),
+        "timestamp": timestamp,
         "scope": "meta",
         "internode_traffic": inter_node_traffic,
     }
 
     logger.log(node_energy_rows, filename="3_energy_log.csv")
+    metrics_core.db.write_energy_rows(node_energy_rows)
     # logger.log([meta_row], filename="meta_log.csv")
-    # time.sleep(LOG_INTERVAL)
+
+
+def log_sample_stats(stats):
+    logger.log([stats], filename="3_sample_log.csv")
+    if stats["skipped_ticks"]:
+        print(
+            f"[Logger] Skipped {stats['skipped_ticks']} tick(s) before {stats['timestamp']}"
+        )
+
+
+# Logging loop: one sample every LOG_INTERVAL seconds on a fixed tick grid
+sampler = PeriodicSampler(
+    collect_sample,
+    interval=LOG_INTERVAL,
+    duration=LOG_DURATION,
+    on_sample=log_sample_stats,
+)
+sampler.run()
+print(f"[Logger] {sampler.samples} samples, {sampler.skipped_ticks} skipped ticks")
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    LRU cache for metric query results.
+
+    Entries are fresh for `ttl` seconds. For up to `stale_ttl` seconds after
+    that they are still served while a single background refresh runs
+    (stale-while-revalidate). Concurrent misses on the same key wait for one
+    shared load instead of each querying Prometheus.
+    """
+
+    def __init__(self, ttl: float = 15.0, stale_ttl: float = 30.0, max_size=256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+
+        self._entries = OrderedDict()  # key -> (value, loaded_at)
+        self._inflight = {}  # key -> threading.Event set when the load ends
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key, loader):
+        """
+        Returns the cached value for key, calling loader() to fill or refresh it.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, loaded_at = entry
+                    age = time.monotonic() - loaded_at
+                    if age < self.ttl:
+                        self._entries.move_to_end(key)
+                        self.stats["hits"] += 1
+                        return value
+                    if age < self.ttl + self.stale_ttl:
+                        self._entries.move_to_end(key)
+                        self.stats["stale_hits"] += 1
+                        if key not in self._inflight:
+                            self._inflight[key] = threading.Event()
+                            self.stats["refreshes"] += 1
+                            threading.Thread(
+                                target=self._load, args=(key, loader), daemon=True
+                            ).start()
+                        return value
+
+                event = self._inflight.get(key)
+                if event is None:
+                    self._inflight[key] = threading.Event()
+                    self.stats["misses"] += 1
+
+            if event is None:
+                return self._load(key, loader, raise_errors=True)
+            # Another thread is loading this key; use its result (or retry
+            # the load ourselves if it failed).
+            event.wait()
+
+    def _load(self, key, loader, raise_errors=False):
+        try:
+            value = loader()
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"[Cache] Background refresh failed for {key}: {e}")
+            return None
+        else:
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+            return value
+        finally:
+            with self._lock:
+                event = self._inflight.pop(key, None)
+            if event is not None:
+                event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,11 +1,26 @@
 import os
 from collections import defaultdict
 
+from metrics.cache import TTLCache
 from metrics.metrics import MetricsCollector
 from metrics.prometheus import PrometheusClient
 from metrics.db import DBManager
 
 PROM_URL = os.getenv("PROM_URL", "http://localhost:9090")
+METRICS_DB_PATH = os.getenv("METRICS_DB_PATH", "metrics.db")
+PROM_QUERY_TIMEOUT = float(os.getenv("PROM_QUERY_TIMEOUT", 5))  # seconds
+PROM_CONCURRENCY = int(os.getenv("PROM_CONCURRENCY", 8))  # parallel queries
+PROM_MAX_RETRIES = int(os.getenv("PROM_MAX_RETRIES", 2))
+# One query per metric family instead of one per pod/node
+PROM_BULK_QUERIES = os.getenv("PROM_BULK_QUERIES", "true").lower() == "true"
+
+# Scheduler inputs cannot change faster than Prometheus scrapes them
+PROM_SCRAPE_INTERVAL = float(os.getenv("PROM_SCRAPE_INTERVAL", 15))  # seconds
+METRICS_CACHE_TTL = float(os.getenv("METRICS_CACHE_TTL", PROM_SCRAPE_INTERVAL))
+METRICS_CACHE_STALE_TTL = float(
+    os.getenv("METRICS_CACHE_STALE_TTL", 2 * PROM_SCRAPE_INTERVAL)
+)
+METRICS_CACHE_SIZE = int(os.getenv("METRICS_CACHE_SIZE", 256))
 
 timeout = 10  # Timeout for app readiness check
 
@@ -13,9 +28,19 @@ timeout = 10  # Timeout for app readiness check
 class MetricsCore:
     def __init__(self, config):
         self.config = config
-        self.prom = PrometheusClient(PROM_URL)
+        self.prom = PrometheusClient(
+            PROM_URL,
+            timeout=PROM_QUERY_TIMEOUT,
+            pool_size=PROM_CONCURRENCY,
+            max_retries=PROM_MAX_RETRIES,
+        )
         self.collector = MetricsCollector(prom=self.prom)
-        self.db = DBManager()
+        self.db = DBManager(db_path=METRICS_DB_PATH)
+        self.cache = TTLCache(
+            ttl=METRICS_CACHE_TTL,
+            stale_ttl=METRICS_CACHE_STALE_TTL,
+            max_size=METRICS_CACHE_SIZE,
+        )
 
     def _flatten_pod_node_map(self, grouped_map):
         flat_map = {}
@@ -52,16 +77,22 @@ class MetricsCore:
         return final
 
     def collect_latency_metrics(self, service_name):
-        latency_metrics = self.collector._get_workload_request_duration(
-            destination_workload=service_name,
+        latency_metrics = self.cache.get(
+            ("latency", service_name),
+            lambda: self.collector._get_workload_request_duration(
+                destination_workload=service_name,
+            ),
         )
 
         return latency_metrics
 
     def collect_traffic_metrics(self, source_workload, destination_workload):
-        traffic_metrics = self.collector.get_request_response_sizes(
-            source_workload=source_workload,
-            destination_workload=destination_workload,
+        traffic_metrics = self.cache.get(
+            ("traffic", source_workload, destination_workload),
+            lambda: self.collector.get_request_response_sizes(
+                source_workload=source_workload,
+                destination_workload=destination_workload,
+            ),
         )
 
         return traffic_metrics
@@ -70,6 +101,8 @@ class MetricsCore:
         """
         Collect energy metrics for the given placement map.
         """
+        if PROM_BULK_QUERIES:
+            return self.collector.get_energy_metrics_bulk(placement_map, ip_mapping)
         raw_metrics = self.collector.get_energy_metrics(placement_map, ip_mapping)
         return raw_metrics
 
@@ -79,7 +112,11 @@ class MetricsCore:
         """
         Collect energy metrics for the given placement map.
         """
+        if PROM_BULK_QUERIES:
+            return self.collector.get_energy_metrics_dashboard_bulk(
+                placement_map, ip_mapping
+            )
         raw_metrics = self.collector.get_energy_metrics_dashboard(
-            placement_map, ip_mapping
+            placement_map, ip_mapping, max_workers=PROM_CONCURRENCY
         )
         return raw_metrics
@@ -1,24 +1,96 @@
+import atexit
+import queue
 import sqlite3
-import os
+import threading
+import time
 from datetime import datetime
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    node TEXT,
+    latency REAL,
+    bandwidth REAL,
+    energy REAL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_log_node_ts
+    ON metrics_log (node, timestamp);
+
+CREATE TABLE IF NOT EXISTS energy_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    name TEXT NOT NULL,
+    node TEXT,
+    cpu_util REAL,
+    power REAL,
+    memory_util REAL,
+    memory_mib REAL
+);
+CREATE INDEX IF NOT EXISTS idx_energy_log_node_ts
+    ON energy_log (node, timestamp);
+"""
+
+INSERT_METRICS = """
+INSERT INTO metrics_log (node, latency, bandwidth, energy, timestamp)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_ENERGY = """
+INSERT INTO energy_log
+    (timestamp, scope, name, node, cpu_util, power, memory_util, memory_mib)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 
 class DBManager:
-    def __init__(self, db_path="metrics.db"):
+    def __init__(
+        self,
+        db_path="metrics.db",
+        batch_size=500,
+        flush_interval=2.0,
+        exit_timeout=10.0,
+    ):
+        """
+        Time-series store for metric snapshots.
+
+        Writes are queued and committed in batches by a background thread,
+        either when batch_size rows are pending or every flush_interval
+        seconds, so callers never wait on the disk. At interpreter exit
+        pending rows get up to exit_timeout seconds to be committed.
+        """
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close, exit_timeout)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
 
     def write_metrics(self, metrics: dict, node: str = None):
         if not metrics:
             print("[DB] Empty metrics, nothing to write.")
             return
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO metrics_log (node, latency, bandwidth, energy, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """,
+        self._queue.put(
+            (
+                "row",
+                INSERT_METRICS,
                 (
                     node,
                     metrics.get("request_duration"),
@@ -27,5 +99,87 @@ class DBManager:
                     datetime.utcnow().isoformat(),
                 ),
             )
-            conn.commit()
-            print(f"[DB] Metrics written for node {node}.")
+        )
+
+    def write_energy_rows(self, rows: list[dict]):
+        """
+        Queues node/pod energy rows as built by the dashboard and logger.
+        """
+        for row in rows:
+            self._queue.put(
+                (
+                    "row",
+                    INSERT_ENERGY,
+                    (
+                        row["timestamp"],
+                        row["scope"],
+                        row["name"],
+                        row.get("node", row["name"]),
+                        row.get("cpu_util"),
+                        row.get("power"),
+                        row.get("memory_util"),
+                        row.get("memory_mib"),
+                    ),
+                )
+            )
+
+    def _send(self, kind, timeout):
+        """Queues a control message; False if the writer is gone or times out."""
+        if not self._thread.is_alive():
+            print(f"[DB] Writer thread is not running, cannot {kind}.")
+            return False
+        done = threading.Event()
+        self._queue.put((kind, done))
+        return done.wait(timeout)
+
+    def flush(self, timeout=None):
+        """Blocks until every row queued so far is committed."""
+        return self._send("flush", timeout)
+
+    def close(self, timeout=None):
+        """Commits pending rows and stops the writer thread."""
+        if self._closed:
+            return True
+        self._closed = True
+        return self._send("stop", timeout)
+
+    def _write_batch(self, conn, pending):
+        by_statement = {}
+        for statement, params in pending:
+            by_statement.setdefault(statement, []).append(params)
+        try:
+            with conn:
+                for statement, rows in by_statement.items():
+                    conn.executemany(statement, rows)
+        except sqlite3.Error as e:
+            print(f"[DB] Failed to write {len(pending)} rows: {e}")
+
+    def _run(self):
+        conn = self._connect()
+        pending = []
+        last_flush = time.monotonic()
+
+        while True:
+            wait = self.flush_interval - (time.monotonic() - last_flush)
+            try:
+                kind, *payload = self._queue.get(timeout=max(0.0, wait))
+            except queue.Empty:
+                kind, payload = "timer", None
+
+            if kind == "row":
+                pending.append(tuple(payload))
+                due = time.monotonic() - last_flush >= self.flush_interval
+                if len(pending) < self.batch_size and not due:
+                    continue
+
+            if pending:
+                self._write_batch(conn, pending)
+                pending = []
+            last_flush = time.monotonic()
+
+            if kind in ("flush", "stop"):
+                payload[0].set()
+            if kind == "stop":
+                break
+
+        conn.close()
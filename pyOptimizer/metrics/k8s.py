@@ -1,14 +1,167 @@
 import time
-from kubernetes import client, config
+import threading
+
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
+
+KNATIVE_SERVICE_LABEL = "serving.knative.dev/service"
+
+
+class ResourceInformer:
+    """
+    Keeps an in-memory copy of a Kubernetes resource list current using
+    list + watch, resuming from the last seen resourceVersion and relisting
+    when the API server reports it as expired (410 Gone). After max_failures
+    consecutive errors the cache is marked unsynced, so callers fall back to
+    direct API calls, and the next attempt starts with a relist.
+
+    list_func is any client list call (e.g. CoreV1Api.list_namespaced_pod);
+    watch_factory can be replaced with a fake producing a canned event stream.
+    """
+
+    def __init__(
+        self,
+        list_func,
+        watch_factory=watch.Watch,
+        watch_timeout=300,
+        retry_delay=1.0,
+        max_failures=3,
+        **list_kwargs,
+    ):
+        self.list_func = list_func
+        self.list_kwargs = list_kwargs
+        self.watch_factory = watch_factory
+        self.watch_timeout = watch_timeout
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+
+        self.items = {}
+        self.resource_version = None
+        self.synced = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watch = None
+        self._thread = None
+        self._failures = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def wait_for_sync(self, timeout=None) -> bool:
+        return self.synced.wait(timeout)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self.items.values())
+
+    def resync(self):
+        """Full relist; replaces the cache and records the list resourceVersion."""
+        response = self.list_func(**self.list_kwargs)
+        with self._lock:
+            self.items = {obj.metadata.name: obj for obj in response.items}
+            self.resource_version = response.metadata.resource_version
+        self.synced.set()
+
+    def handle_event(self, event) -> bool:
+        """
+        Applies one watch event to the cache.
+        Returns False when the watch must be restarted with a relist.
+        """
+        event_type = event["type"]
+        obj = event["object"]
+
+        if event_type == "ERROR":
+            raw = event.get("raw_object") or {}
+            print(f"[Informer] Watch error: {raw.get('message', raw)}")
+            self.resource_version = None
+            return False
+
+        with self._lock:
+            if event_type in ("ADDED", "MODIFIED"):
+                self.items[obj.metadata.name] = obj
+            elif event_type == "DELETED":
+                self.items.pop(obj.metadata.name, None)
+            self.resource_version = obj.metadata.resource_version
+        return True
+
+    def watch_once(self):
+        self._watch = self.watch_factory()
+        stream = self._watch.stream(
+            self.list_func,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout,
+            allow_watch_bookmarks=True,
+            **self.list_kwargs,
+        )
+        for event in stream:
+            if self._stop.is_set() or not self.handle_event(event):
+                self._watch.stop()
+                break
+
+    def _failed(self, message):
+        self._failures += 1
+        print(f"[Informer] {message} ({self._failures}/{self.max_failures})")
+        if self._failures >= self.max_failures:
+            print("[Informer] Too many failures, marking cache stale and relisting")
+            self.synced.clear()
+            self.resource_version = None
+            self._failures = 0
+        self._stop.wait(self.retry_delay)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self.resync()
+                self.watch_once()
+                self._failures = 0
+            except ApiException as e:
+                if e.status == 410:
+                    self.resource_version = None
+                    continue
+                self._failed(f"API error, retrying: {e.status} {e.reason}")
+            except Exception as e:
+                self.resource_version = None
+                self._failed(f"Watch failed, relisting: {e}")
 
 
 class KubernetesManager:
-    def __init__(self, namespace="default", config_file=None):
+    def __init__(self, namespace="default", config_file=None, use_informers=False):
         config.load_kube_config(config_file=config_file)
         self.namespace = namespace
         self.apps = client.AppsV1Api()
         self.core = client.CoreV1Api()
 
+        self.pod_informer = None
+        self.node_informer = None
+        if use_informers:
+            self.start_informers()
+
+    def start_informers(self, sync_timeout=10):
+        """
+        Starts background pod and node informers so get_pod_mapping and
+        get_internal_ip_mapping are served from memory.
+        """
+        self.pod_informer = ResourceInformer(
+            self.core.list_namespaced_pod, namespace=self.namespace
+        ).start()
+        self.node_informer = ResourceInformer(self.core.list_node).start()
+        self.pod_informer.wait_for_sync(sync_timeout)
+        self.node_informer.wait_for_sync(sync_timeout)
+
+    def stop_informers(self):
+        for informer in (self.pod_informer, self.node_informer):
+            if informer is not None:
+                informer.stop()
+
     def get_running_node(self, app_name):
         pods = self.core.list_namespaced_pod(
             namespace=self.namespace, label_selector=f"app={app_name}"
@@ -25,9 +178,13 @@ class KubernetesManager:
         return [node.metadata.name for node in nodes]
 
     def get_internal_ip_mapping(self):
-        nodes = self.core.list_node()
+        if self.node_informer is not None and self.node_informer.synced.is_set():
+            nodes = self.node_informer.snapshot()
+        else:
+            nodes = self.core.list_node().items
+
         internal_ips = {}
-        for node in nodes.items:
+        for node in nodes:
             node_name = node.metadata.name
             for addr in node.status.addresses:
                 if addr.type == "InternalIP":
@@ -35,11 +192,14 @@ class KubernetesManager:
         return internal_ips
 
     def get_pod_mapping(self, services: list[str]):
+        if self.pod_informer is not None and self.pod_informer.synced.is_set():
+            return build_pod_mapping(self.pod_informer.snapshot(), services)
+
         service_pods = {}
         for service in services:
             all_pods = self.core.list_namespaced_pod(
                 namespace=self.namespace,
-                label_selector=f"serving.knative.dev/service={service}",
+                label_selector=f"{KNATIVE_SERVICE_LABEL}={service}",
             ).items
 
             if not all_pods:
@@ -109,3 +269,32 @@ class KubernetesManager:
 
         print(f"Patched deployment '{deployment_name}' to prefer node '{target_node}'")
         return response
+
+
+def build_pod_mapping(pods, services: list[str]) -> dict:
+    """
+    Groups running pods into {service: {node: [pods]}}, matching on the Knative
+    service label and falling back to the app label, like get_pod_mapping.
+    """
+    by_knative, by_app = {}, {}
+    for pod in pods:
+        labels = pod.metadata.labels or {}
+        if KNATIVE_SERVICE_LABEL in labels:
+            by_knative.setdefault(labels[KNATIVE_SERVICE_LABEL], []).append(pod)
+        if "app" in labels:
+            by_app.setdefault(labels["app"], []).append(pod)
+
+    service_pods = {}
+    for service in services:
+        all_pods = by_knative.get(service) or by_app.get(service)
+        if not all_pods:
+            continue
+
+        service_pods[service] = {}
+        for pod in all_pods:
+            if pod.status.phase != "Running":
+                continue
+            service_pods[service].setdefault(pod.spec.node_name, []).append(
+                pod.metadata.name
+            )
+    return service_pods
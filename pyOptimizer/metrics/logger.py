@@ -1,15 +1,228 @@
+import atexit
 import csv
 import os
+import threading
+import time
 from datetime import datetime
 
 
+class _CsvSink:
+    """
+    Appends rows to one CSV file through a handle kept open between flushes.
+    Columns are fixed by the file's header (or the first row of a new file):
+    missing keys are left empty and unknown keys are dropped with a warning.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = None
+        self.writer = None
+        self.ignored = set()
+
+    def _existing_header(self):
+        if not os.path.exists(self.filename):
+            return None
+        with open(self.filename, newline="") as f:
+            return next(csv.reader(f), None)
+
+    def write(self, rows: list[dict]):
+        if self.writer is None:
+            header = self._existing_header()
+            self.file = open(self.filename, "a", newline="")
+            self.writer = csv.DictWriter(
+                self.file,
+                fieldnames=header or list(rows[0].keys()),
+                restval="",
+                extrasaction="ignore",
+            )
+            if not header:
+                self.writer.writeheader()
+
+        fieldnames = set(self.writer.fieldnames)
+        extra = {key for row in rows for key in row if key not in fieldnames}
+        if extra - self.ignored:
+            print(
+                f"[Logger] {self.filename}: dropping columns not in the header: "
+                f"{sorted(extra - self.ignored)}"
+            )
+            self.ignored |= extra
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
+
+
+class _ArrowSink:
+    """
+    Writes rows as Parquet or Arrow IPC record batches, rotating to a new
+    numbered part file (e.g. 3_energy_log-0001.parquet) every rotate_rows rows.
+    """
+
+    def __init__(
+        self, filename: str, format: str, rotate_rows: int = None, schema=None
+    ):
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ImportError(f"{format} logging requires pyarrow") from e
+
+        self.pa = pyarrow
+        self.format = format
+        self.rotate_rows = rotate_rows
+        self.stem = os.path.splitext(filename)[0]
+        self.extension = ".parquet" if format == "parquet" else ".arrow"
+        self.part = 0
+        self.part_rows = 0
+        self.schema = schema
+        self.writer = None
+
+    def _infer_schema(self, rows: list[dict]):
+        """
+        Schema from the first batch, widened so later batches still fit: an
+        all-None column (null type) and integer columns become float64.
+        """
+        pa = self.pa
+        fields = []
+        for field in pa.Table.from_pylist(rows).schema:
+            if pa.types.is_null(field.type) or pa.types.is_integer(field.type):
+                field = field.with_type(pa.float64())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _next_path(self) -> str:
+        # Never overwrite parts left by an earlier run
+        while True:
+            path = f"{self.stem}-{self.part:04d}{self.extension}"
+            self.part += 1
+            if not os.path.exists(path):
+                return path
+
+    def _open(self):
+        path = self._next_path()
+        if self.format == "parquet":
+            import pyarrow.parquet as pq
+
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = self.pa.ipc.new_file(path, self.schema)
+        self.part_rows = 0
+
+    def write(self, rows: list[dict]):
+        if self.schema is None:
+            self.schema = self._infer_schema(rows)
+        if self.writer is None:
+            self._open()
+
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        self.writer.write_table(table)
+        self.part_rows += len(rows)
+
+        if self.rotate_rows and self.part_rows >= self.rotate_rows:
+            self.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
 class ExperimentLogger:
+    def __init__(
+        self,
+        format: str = "csv",
+        flush_rows: int = 1000,
+        flush_interval: float = 10.0,
+        rotate_rows: int = None,
+        schemas: dict = None,
+    ):
+        """
+        Buffers logged rows in memory and writes them per file when flush_rows
+        rows are pending or flush_interval seconds have passed.
+
+        Args:
+            format: "csv", "parquet" or "arrow" (Arrow IPC); the columnar
+                formats need pyarrow and rotate to a new part every rotate_rows
+            flush_rows: rows buffered per file before writing
+            flush_interval: max seconds a row stays buffered
+            rotate_rows: rows per columnar part file, None for a single file
+            schemas: optional filename -> pyarrow.Schema for the columnar
+                formats; other files infer theirs from the first batch
+        """
+        self.format = format
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_rows = rotate_rows
+        self.schemas = schemas or {}
+
+        self._sinks = {}  # filename -> sink
+        self._buffers = {}  # filename -> pending rows
+        self._last_flush = {}  # filename -> monotonic time of last write
+        self.dropped_rows = {}  # filename -> rows lost to failed writes
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _sink(self, filename: str):
+        if filename not in self._sinks:
+            if self.format == "csv":
+                self._sinks[filename] = _CsvSink(filename)
+            else:
+                self._sinks[filename] = _ArrowSink(
+                    filename,
+                    self.format,
+                    self.rotate_rows,
+                    self.schemas.get(filename),
+                )
+        return self._sinks[filename]
+
+    def _flush_file(self, filename: str):
+        rows = self._buffers.get(filename)
+        # Cleared before writing, so a failed batch never blocks later ones
+        self._buffers[filename] = []
+        self._last_flush[filename] = time.monotonic()
+        if not rows:
+            return
+
+        try:
+            self._sink(filename).write(rows)
+        except Exception as e:
+            self.dropped_rows[filename] = self.dropped_rows.get(filename, 0) + len(rows)
+            print(f"[Logger] Failed to write {len(rows)} rows to {filename}: {e}")
+            # Reopen on the next write; a columnar sink starts a new part
+            sink = self._sinks.pop(filename, None)
+            try:
+                if sink is not None:
+                    sink.close()
+            except Exception:
+                pass
+
     def log(self, rows: list[dict], filename: str = "experiment_log.csv"):
-        header_written = os.path.exists(filename)
-        write_header = not header_written
-        with open(filename, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-            if write_header:
-                writer.writeheader()
-                self.header_written = True
-            writer.writerows(rows)
+        if not rows:
+            return
+
+        with self._lock:
+            self._buffers.setdefault(filename, []).extend(rows)
+            self._last_flush.setdefault(filename, time.monotonic())
+
+            elapsed = time.monotonic() - self._last_flush[filename]
+            if (
+                len(self._buffers[filename]) >= self.flush_rows
+                or elapsed >= self.flush_interval
+            ):
+                self._flush_file(filename)
+
+    def flush(self):
+        with self._lock:
+            for filename in list(self._buffers):
+                self._flush_file(filename)
+
+    def close(self):
+        with self._lock:
+            for filename in list(self._buffers):
+                self._flush_file(filename)
+            for sink in self._sinks.values():
+                sink.close()
+            self._sinks = {}
@@ -1,5 +1,6 @@
 import math
 import re
+from concurrent.futures import ThreadPoolExecutor
 import networkx as nx
 from metrics.queries import (
     REQUEST_PER_SEC_QUERY,
@@ -9,6 +10,11 @@ from metrics.queries import (
     NODE_ENERGY,
     POD_MEMORY,
     NODE_MEMORY,
+    POD_ENERGY_BULK,
+    NODE_ENERGY_BULK,
+    POD_MEMORY_BULK,
+    NODE_MEMORY_BULK,
+    POD_NODE_INFO,
     REQUEST_TOTAL,
     REQUEST_SIZE_QUERY,
     RESPONSE_SIZE_QUERY,
@@ -212,6 +218,85 @@ class MetricsCollector:
             return None
         return None
 
+    def _query_vector(self, query: str, label: str) -> dict:
+        """
+        Runs one instant query and demultiplexes the result vector by label.
+        For the instance label the exporter port is stripped, leaving the IP.
+        """
+        values = {}
+        for entry in self.prom.query(query) or []:
+            key = entry["metric"].get(label)
+            try:
+                value = float(entry["value"][1])
+            except (ValueError, TypeError, IndexError):
+                continue
+            if key is None or math.isnan(value):
+                continue
+            if label == "instance":
+                key = key.rsplit(":", 1)[0]
+            values[key] = value
+        return values
+
+    def _query_range_chunks(self, query: str, start: float, end: float, step: float):
+        """
+        Yields the result matrix of a range query chunk by chunk, so no series
+        exceeds Prometheus' point limit. Raises if a chunk fails instead of
+        returning partial data.
+        """
+        MAX_POINTS = 10000
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(end, chunk_start + (MAX_POINTS - 1) * step)
+            result = self.prom.query_range(query, chunk_start, chunk_end, step)
+            if result is None:
+                raise RuntimeError(
+                    f"Range query failed for [{chunk_start}, {chunk_end}]: "
+                    f"{query.strip()}"
+                )
+            yield from result
+            chunk_start = chunk_end + step
+
+    def _query_matrix(
+        self, query: str, label: str, start: float, end: float, step: float
+    ) -> dict:
+        """
+        Runs a range query and demultiplexes it into {label value: {ts: value}}.
+        """
+        series = {}
+        for entry in self._query_range_chunks(query, start, end, step):
+            key = entry["metric"].get(label)
+            if key is None:
+                continue
+            if label == "instance":
+                key = key.rsplit(":", 1)[0]
+            points = series.setdefault(key, {})
+            for ts, raw in entry["values"]:
+                try:
+                    value = float(raw)
+                except (ValueError, TypeError):
+                    continue
+                if not math.isnan(value):
+                    points[float(ts)] = value
+        return series
+
+    def _get_bulk_energy_vectors(self, max_workers: int = 4) -> dict:
+        """
+        Fetches CPU and memory for every pod and node with one query per
+        metric family, issued in parallel.
+        """
+        queries = {
+            "pod_cpu": (POD_ENERGY_BULK, "pod"),
+            "pod_mem": (POD_MEMORY_BULK, "pod"),
+            "node_cpu": (NODE_ENERGY_BULK, "instance"),
+            "node_mem": (NODE_MEMORY_BULK, "instance"),
+        }
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                name: pool.submit(self._query_vector, query, label)
+                for name, (query, label) in queries.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
     # =========== Metrics Collection
     def get_energy_metrics(self, placement_map: dict, ip_mapping: dict = None) -> dict:
         """
@@ -233,46 +318,171 @@ class MetricsCollector:
 
         return node_energy
 
+    def get_energy_metrics_bulk(
+        self, placement_map: dict, ip_mapping: dict = None
+    ) -> dict:
+        """
+        Same result as get_energy_metrics using a single node CPU query.
+        """
+        CORES_PER_NODE = 4.0
+        node_cpu = self._query_vector(NODE_ENERGY_BULK, "instance")
+        node_energy = {}
+
+        for node, ip in ip_mapping.items():
+            if ip not in node_cpu:
+                continue
+            cpu_util = node_cpu[ip] / CORES_PER_NODE
+            power = 4.5344 * cpu_util + 2.2857
+            node_energy[node] = {
+                "cpu_util": round(cpu_util, 6),
+                "power": round(power, 6),
+            }
+
+        return node_energy
+
     # =========== Dashboard Metrics
 
+    def _build_pod_metric(self, pod, node, cpu, mem):
+        CORES_PER_NODE = 4.0
+        if cpu is None:
+            return None
+        normalized_cpu = cpu / CORES_PER_NODE
+        power = 4.5344 * normalized_cpu
+        return {
+            "pod": pod,
+            "node": node,
+            "cpu_util": round(normalized_cpu, 6),
+            "power": round(power, 6),
+            "memory_mib": mem or 0.0,
+        }
+
+    def _build_node_metric(self, node, cpu_util, mem_util):
+        if cpu_util is None:
+            return None
+        power = 4.5344 * cpu_util + 2.2857
+        return {
+            "node": node,
+            "cpu_util": round(cpu_util, 6),
+            "power": round(power, 6),
+            "memory_util": mem_util or 0.0,  # as fraction
+        }
+
     def get_energy_metrics_dashboard(
-        self, placement_map: dict, ip_mapping: dict
+        self, placement_map: dict, ip_mapping: dict, max_workers: int = 1
     ) -> dict:
+        """
+        Per-pod and per-node CPU, power and memory for the dashboard.
+        Queries are issued in parallel on up to max_workers threads;
+        the result order matches placement_map and ip_mapping.
+        """
+        pods = [
+            (pod, node)
+            for node_dict in placement_map.values()
+            for node, node_pods in node_dict.items()
+            for pod in node_pods
+        ]
+        pod_names = [pod for pod, _ in pods]
+        node_ips = list(ip_mapping.values())
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            pod_cpu = pool.map(self._get_pod_cpu_util, pod_names)
+            pod_mem = pool.map(self._get_pod_memory_util, pod_names)
+            node_cpu = pool.map(self._get_node_cpu_util, node_ips)
+            node_mem = pool.map(self._get_node_memory_util, node_ips)
+
+            pod_metrics = [
+                self._build_pod_metric(pod, node, cpu, mem)
+                for (pod, node), cpu, mem in zip(pods, pod_cpu, pod_mem)
+            ]
+            node_metrics = [
+                self._build_node_metric(node, cpu, mem)
+                for node, cpu, mem in zip(ip_mapping, node_cpu, node_mem)
+            ]
+
+        return {
+            "pod_metrics": [row for row in pod_metrics if row is not None],
+            "node_metrics": [row for row in node_metrics if row is not None],
+        }
+
+    def get_energy_metrics_dashboard_bulk(
+        self, placement_map: dict, ip_mapping: dict, max_workers: int = 4
+    ) -> dict:
+        """
+        Same result as get_energy_metrics_dashboard with a constant number of
+        Prometheus queries, independent of the number of pods and nodes.
+        """
         CORES_PER_NODE = 4.0
+        vectors = self._get_bulk_energy_vectors(max_workers=max_workers)
         pod_metrics = []
         node_metrics = []
 
-        for service, node_dict in placement_map.items():
+        for node_dict in placement_map.values():
             for node, pods in node_dict.items():
                 for pod in pods:
-                    cpu = self._get_pod_cpu_util(pod)
-                    mem = self._get_pod_memory_util(pod)
-                    if cpu is not None:
-                        normalized_cpu = cpu / CORES_PER_NODE
-                        power = 4.5344 * normalized_cpu
-                        pod_metrics.append(
-                            {
-                                "pod": pod,
-                                "node": node,
-                                "cpu_util": round(normalized_cpu, 6),
-                                "power": round(power, 6),
-                                "memory_mib": mem or 0.0,
-                            }
-                        )
+                    mem = vectors["pod_mem"].get(pod)
+                    if mem is not None:
+                        mem = round(mem / (1024 * 1024), 2)  # Convert to MiB
+                    row = self._build_pod_metric(
+                        pod, node, vectors["pod_cpu"].get(pod), mem
+                    )
+                    if row is not None:
+                        pod_metrics.append(row)
 
         for node, ip in ip_mapping.items():
-            cpu_util = self._get_node_cpu_util(ip)
-            mem_util = self._get_node_memory_util(ip)
+            cpu_util = vectors["node_cpu"].get(ip)
             if cpu_util is not None:
-                power = 4.5344 * cpu_util + 2.2857
-                node_metrics.append(
-                    {
-                        "node": node,
-                        "cpu_util": round(cpu_util, 6),
-                        "power": round(power, 6),
-                        "memory_util": mem_util or 0.0,  # as fraction
-                    }
-                )
+                cpu_util = cpu_util / CORES_PER_NODE
+            mem_util = vectors["node_mem"].get(ip)
+            if mem_util is not None:
+                mem_util = round(mem_util, 4)
+            row = self._build_node_metric(node, cpu_util, mem_util)
+            if row is not None:
+                node_metrics.append(row)
+
+        return {
+            "pod_metrics": pod_metrics,
+            "node_metrics": node_metrics,
+        }
+
+    def get_energy_metrics_range(
+        self, ip_mapping: dict, start: float, end: float, step: float
+    ) -> dict:
+        """
+        Dashboard-style pod and node rows for every step in [start, end],
+        fetched with one range query per metric family. Each row carries a
+        unix "timestamp"; pods are mapped to nodes via kube_pod_info.
+        """
+        CORES_PER_NODE = 4.0
+        pod_cpu = self._query_matrix(POD_ENERGY_BULK, "pod", start, end, step)
+        pod_mem = self._query_matrix(POD_MEMORY_BULK, "pod", start, end, step)
+        node_cpu = self._query_matrix(NODE_ENERGY_BULK, "instance", start, end, step)
+        node_mem = self._query_matrix(NODE_MEMORY_BULK, "instance", start, end, step)
+
+        pod_node = {}
+        for entry in self._query_range_chunks(POD_NODE_INFO, start, end, step):
+            pod = entry["metric"].get("pod")
+            if pod is not None:
+                pod_node[pod] = entry["metric"].get("node")
+
+        pod_metrics = []
+        for pod, points in pod_cpu.items():
+            mem_points = pod_mem.get(pod, {})
+            for ts, cpu in sorted(points.items()):
+                mem = mem_points.get(ts)
+                if mem is not None:
+                    mem = round(mem / (1024 * 1024), 2)  # Convert to MiB
+                row = self._build_pod_metric(pod, pod_node.get(pod), cpu, mem)
+                pod_metrics.append({"timestamp": ts, **row})
+
+        node_metrics = []
+        for node, ip in ip_mapping.items():
+            mem_points = node_mem.get(ip, {})
+            for ts, cpu in sorted(node_cpu.get(ip, {}).items()):
+                mem = mem_points.get(ts)
+                if mem is not None:
+                    mem = round(mem, 4)
+                row = self._build_node_metric(node, cpu / CORES_PER_NODE, mem)
+                node_metrics.append({"timestamp": ts, **row})
 
         return {
             "pod_metrics": pod_metrics,
@@ -1,20 +1,109 @@
+import random
+import threading
+import time
+
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = {500, 502, 503, 504}
 
 
 class PrometheusClient:
-    def __init__(self, url: str):
+    def __init__(
+        self,
+        url: str,
+        timeout: float = None,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        backoff: float = 0.2,
+    ):
+        """
+        Args:
+            url: Prometheus base URL
+            timeout: seconds per query, None waits forever
+            pool_size: max keep-alive connections kept to Prometheus
+            max_retries: retries on 5xx responses and connection errors
+            backoff: base delay in seconds for jittered exponential backoff
+        """
         self.url: str = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
 
-    def query(self, query):
+        self.adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip"})
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.stats = {"queries": 0, "retries": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _get(self, path: str, params: dict) -> Response:
+        """GET with full-jitter exponential backoff on 5xx and connection errors."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self.session.get(
+                    f"{self.url}{path}", params=params, timeout=self.timeout
+                )
+                if (
+                    resp.status_code not in RETRY_STATUS_CODES
+                    or attempt == self.max_retries
+                ):
+                    return resp
+            except requests.ConnectionError:
+                if attempt == self.max_retries:
+                    raise
+            self._count("retries")
+            time.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    def _api_query(self, path: str, params: dict):
+        self._count("queries")
         try:
-            resp: Response = requests.get(
-                f"{self.url}/api/v1/query", params={"query": query}
-            )
+            resp: Response = self._get(path, params=params)
             data = resp.json()
             if data["status"] != "success":
                 print("Error in response:", data["error"])
                 return None
             return data["data"]["result"]
         except Exception as e:
+            self._count("failures")
             raise Exception(f"Exception in Querying Prometheus: {e}")
+
+    def query(self, query):
+        return self._api_query("/api/v1/query", {"query": query})
+
+    def query_range(self, query, start: float, end: float, step: float):
+        """
+        Range query over [start, end] (unix seconds) at step-second resolution.
+        Returns the result matrix: [{"metric": {...}, "values": [[ts, "v"], ...]}].
+        """
+        return self._api_query(
+            "/api/v1/query_range",
+            {"query": query, "start": start, "end": end, "step": step},
+        )
+
+    def connection_stats(self) -> dict:
+        """
+        Query counters plus connections opened vs requests sent over the pool;
+        connections_reused > 0 means keep-alive is working.
+        """
+        opened, sent = 0, 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            opened += pool.num_connections
+            sent += pool.num_requests
+
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["connections_opened"] = opened
+        stats["connections_reused"] = max(0, sent - opened)
+        return stats
@@ -88,3 +88,34 @@ NODE_MEMORY = """
   (node_memory_MemTotal_bytes{{instance="{instance_ip}:9100"}})
 )
 """
+
+# Bulk energy queries: one vector for all pods / nodes, demultiplexed by label
+
+POD_ENERGY_BULK = """
+sum(rate(container_cpu_usage_seconds_total{
+  namespace="default"
+}[1m])) by (pod)
+"""
+
+NODE_ENERGY_BULK = """
+1 - avg(rate(node_cpu_seconds_total{mode="idle"}[1m])) by (instance)
+"""
+
+POD_MEMORY_BULK = """
+max(container_memory_working_set_bytes{
+  namespace="default"
+}) by (pod)
+"""
+
+NODE_MEMORY_BULK = """
+1 - (
+  node_memory_MemAvailable_bytes /
+  node_memory_MemTotal_bytes
+)
+"""
+
+# Pod to node assignment from kube-state-metrics, for range backfills
+
+POD_NODE_INFO = """
+max(kube_pod_info{namespace="default"}) by (pod, node)
+"""
@@ -0,0 +1,105 @@
+import datetime
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PeriodicSampler:
+    """
+    Calls a sampling function at fixed ticks (start + k * interval) without drift.
+
+    Each sample runs on a worker thread while the sampler waits for the next
+    tick, so collection overlaps with waiting. A tick that arrives while the
+    previous sample is still running, or that was missed entirely, is skipped
+    and counted instead of being queued, so samples stay on the tick grid.
+    """
+
+    def __init__(self, func, interval: float, duration: float = None, on_sample=None):
+        """
+        Args:
+            func: called as func(tick_time) with the scheduled tick as a datetime
+            interval: seconds between ticks
+            duration: total seconds to sample, None runs until stop()
+            on_sample: called with a stats dict after every sample
+        """
+        self.func = func
+        self.interval = interval
+        self.duration = duration
+        self.on_sample = on_sample
+
+        self.samples = 0
+        self.skipped_ticks = 0
+        self._skipped_since_sample = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sample(
+        self,
+        tick: int,
+        tick_time: datetime.datetime,
+        scheduled: float,
+        skipped_before: int,
+    ):
+        started = time.monotonic()
+        error = None
+        try:
+            self.func(tick_time)
+        except Exception as e:
+            error = str(e)
+            print(f"[Sampler] Sample {tick} failed: {e}")
+        latency = time.monotonic() - started
+
+        self.samples += 1
+        stats = {
+            "timestamp": tick_time.isoformat(),
+            "scope": "sample",
+            "tick": tick,
+            "start_delay_seconds": round(started - scheduled, 6),
+            "collection_latency_seconds": round(latency, 6),
+            "skipped_ticks": skipped_before,
+            "error": error or "",
+        }
+        if self.on_sample is not None:
+            self.on_sample(stats)
+
+    # Skip counters are only touched from run(), so no lock is needed
+    def _skip(self, count: int):
+        self.skipped_ticks += count
+        self._skipped_since_sample += count
+
+    def run(self):
+        start = time.monotonic()
+        start_wall = time.time()
+        tick = 0
+        pending = None
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            while self.duration is None or tick * self.interval < self.duration:
+                scheduled = start + tick * self.interval
+                delay = scheduled - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+
+                # Ticks missed entirely (e.g. the process was paused)
+                current = math.floor((time.monotonic() - start) / self.interval)
+                if current > tick:
+                    self._skip(current - tick)
+                    tick = current
+                    continue
+
+                if pending is not None and not pending.done():
+                    self._skip(1)
+                else:
+                    tick_time = datetime.datetime.fromtimestamp(
+                        start_wall + tick * self.interval
+                    )
+                    # Ticks skipped since the previous sample belong to this row
+                    skipped_before = self._skipped_since_sample
+                    self._skipped_since_sample = 0
+                    pending = pool.submit(
+                        self._sample, tick, tick_time, scheduled, skipped_before
+                    )
+                tick += 1
@@ -1,15 +1,36 @@
+def build_association_index(association_graph):
+    """
+    Indexes association_graph edges by service, keeping graph order.
+
+    Returns:
+        dict with "out": {src: [(dst, meta)]} and "in": {dst: [(src, meta)]}
+    """
+    index = {"out": {}, "in": {}}
+    for (src, dst), meta in association_graph.items():
+        index["out"].setdefault(src, []).append((dst, meta))
+        index["in"].setdefault(dst, []).append((src, meta))
+    return index
+
+
 class HeuristicScheduler:
     def __init__(self, placement_map, nodes, config):
         """
         Args:
             placement_map: dict of {service: {node: [pods]}}
             traffic_graph: dict of {service: [dependent_service]}
-            config: weights and cost mappings
+            config: weights and cost mappings; a prebuilt "association_index"
+                is reused, otherwise one is built from "association_graph"
         """
         self.placement_map = placement_map
         self.nodes = nodes
         self.config = config
 
+        index = config.get("association_index") or build_association_index(
+            config.get("association_graph", {})
+        )
+        self.out_edges = index["out"]
+        self.in_edges = index["in"]
+
     def node_has_pods(self, node):
         return any(node in node_pods for node_pods in self.placement_map.values())
 
@@ -26,11 +47,23 @@ class HeuristicScheduler:
             return 0.0
         return colocated_pods / total_pods
 
-    def get_effective_latency(self, node: str, colocated: bool, meta: dict) -> float:
+    def get_node_latency(self, app_name: str = None) -> dict:
+        """
+        Returns measured per-node latencies (ms) overriding the graph estimates.
+        Per-service latencies in config["service_latency"] take precedence over
+        config["node_latency"] when placing several services in one batch.
+        """
+        return self.config.get("service_latency", {}).get(
+            app_name, self.config.get("node_latency") or {}
+        )
+
+    def get_effective_latency(
+        self, node: str, colocated: bool, meta: dict, app_name: str = None
+    ) -> float:
         """
         Returns the effective latency for a given node, considering colocation and overrides.
         """
-        node_latency = self.config.get("node_latency", {})
+        node_latency = self.get_node_latency(app_name)
 
         if node in node_latency:
             return node_latency[node] / 1000
@@ -48,10 +81,7 @@ class HeuristicScheduler:
             traffic_total = 0.0
             latency_total = 0.0
 
-            for (src, dst), meta in self.config["association_graph"].items():
-                if src != app_name:
-                    continue
-
+            for dst, meta in self.out_edges.get(app_name, []):
                 coloc_ratio = self.get_colocation_ratio(dst, node)
                 is_colocated = coloc_ratio >= 1.0
 
@@ -62,7 +92,9 @@ class HeuristicScheduler:
                 )
 
                 # --- Latency ---
-                latency_val = self.get_effective_latency(node, is_colocated, meta)
+                latency_val = self.get_effective_latency(
+                    node, is_colocated, meta, app_name
+                )
                 latency_total += latency_val
 
             activation_cost = self.compute_energy_activation_penalty(node, app_name)
@@ -107,3 +139,30 @@ class HeuristicScheduler:
                 best_node = node
 
         return best_node, best_score
+
+    def record_placement(self, app_name, node, pod_name=None):
+        """
+        Adds a pod to the in-memory placement map so later decisions see it.
+        """
+        node_pods = self.placement_map.setdefault(app_name, {}).setdefault(node, [])
+        node_pods.append(pod_name or f"{app_name}-pending-{len(node_pods)}")
+
+    def place_many(self, app_names, pod_names=None):
+        """
+        Places a batch of pods in order, updating placement_map after each decision.
+
+        Args:
+            app_names: list of service names, one entry per pod to place
+            pod_names: optional list of pod names aligned with app_names
+
+        Returns:
+            list of (node, score) tuples in the same order as app_names
+        """
+        pod_names = pod_names or [None] * len(app_names)
+        placements = []
+        for app_name, pod_name in zip(app_names, pod_names):
+            node, score = self.place(app_name)
+            if node is not None:
+                self.record_placement(app_name, node, pod_name)
+            placements.append((node, score))
+        return placements
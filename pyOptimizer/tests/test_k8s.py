@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+from kubernetes.client.rest import ApiException
+
+from metrics.k8s import ResourceInformer
+
+
+def pod(name, resource_version):
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name=name, resource_version=resource_version)
+    )
+
+
+def pod_list(*pods, resource_version="1"):
+    return SimpleNamespace(
+        items=list(pods), metadata=SimpleNamespace(resource_version=resource_version)
+    )
+
+
+class FakeWatch:
+    """Replays a canned event list, or raises the given exception from stream."""
+
+    def __init__(self, events=(), error=None):
+        self.events = events
+        self.error = error
+        self.calls = []
+        self.stopped = False
+
+    def __call__(self):
+        return self
+
+    def stream(self, func, **kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        yield from self.events
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_watch_applies_events_after_resync():
+    events = [
+        {"type": "ADDED", "object": pod("c", "2")},
+        {"type": "MODIFIED", "object": pod("a", "3")},
+        {"type": "DELETED", "object": pod("b", "4")},
+    ]
+    fake = FakeWatch(events)
+    informer = ResourceInformer(
+        lambda **kwargs: pod_list(pod("a", "1"), pod("b", "1")),
+        watch_factory=fake,
+        namespace="default",
+    )
+
+    informer.resync()
+    assert informer.synced.is_set()
+    informer.watch_once()
+
+    assert fake.calls[0]["resource_version"] == "1"
+    assert fake.calls[0]["namespace"] == "default"
+    assert sorted(p.metadata.name for p in informer.snapshot()) == ["a", "c"]
+    assert informer.items["a"].metadata.resource_version == "3"
+    assert informer.resource_version == "4"
+
+
+def test_error_event_stops_watch_and_forces_relist():
+    fake = FakeWatch(
+        [
+            {"type": "ERROR", "object": None, "raw_object": {"message": "too old"}},
+            {"type": "ADDED", "object": pod("c", "2")},
+        ]
+    )
+    informer = ResourceInformer(lambda **kwargs: pod_list(pod("a", "1")), fake)
+
+    informer.resync()
+    informer.watch_once()
+
+    assert fake.stopped
+    assert informer.resource_version is None
+    assert "c" not in informer.items
+
+
+def test_repeated_api_errors_clear_synced_and_relist():
+    synced_at_list = []
+
+    def list_pods(**kwargs):
+        synced_at_list.append(informer.synced.is_set())
+        return pod_list(pod("a", "1"))
+
+    fake = FakeWatch()
+    informer = ResourceInformer(list_pods, fake, retry_delay=0, max_failures=3)
+    synced_at_watch = []
+
+    def stream(func, **kwargs):
+        fake.calls.append(kwargs)
+        synced_at_watch.append(informer.synced.is_set())
+        if len(fake.calls) == 4:
+            informer._stop.set()
+        raise ApiException(status=403, reason="Forbidden")
+
+    fake.stream = stream
+    informer.run()
+
+    # Served from cache within the failure budget, then marked stale and relisted
+    assert synced_at_watch == [True, True, True, True]
+    assert synced_at_list == [False, False]
+    assert fake.calls[3]["resource_version"] == "1"
+
+
+def test_failed_relist_leaves_cache_unsynced():
+    fake = FakeWatch(error=ApiException(status=403, reason="Forbidden"))
+    calls = []
+
+    def list_pods(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            return pod_list(pod("a", "1"))
+        if len(calls) == 3:
+            informer._stop.set()
+        raise ApiException(status=403, reason="Forbidden")
+
+    informer = ResourceInformer(list_pods, fake, retry_delay=0, max_failures=2)
+    informer.run()
+
+    assert not informer.synced.is_set()
@@ -0,0 +1,59 @@
+import csv
+
+import pytest
+
+from metrics.logger import ExperimentLogger
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_rows_with_other_keys_do_not_block_the_buffer(tmp_path):
+    path = str(tmp_path / "log.csv")
+    logger = ExperimentLogger(flush_rows=1)
+
+    logger.log([{"a": 1, "b": 2}], path)
+    logger.log([{"a": 3, "c": 4}], path)  # used to raise ValueError forever
+    logger.log([{"a": 5, "b": 6}], path)
+    logger.close()
+
+    assert logger._buffers[path] == []
+    assert read_csv(path) == [
+        {"a": "1", "b": "2"},
+        {"a": "3", "b": ""},
+        {"a": "5", "b": "6"},
+    ]
+
+
+def test_csv_appends_using_the_existing_header(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("b,a\n1,2\n")
+    logger = ExperimentLogger(flush_rows=1)
+
+    logger.log([{"a": 3, "b": 4}], str(path))
+    logger.close()
+
+    assert read_csv(path) == [{"b": "1", "a": "2"}, {"b": "4", "a": "3"}]
+
+
+def test_failed_write_is_dropped_and_later_rows_are_written(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    stem = tmp_path / "log"
+    logger = ExperimentLogger(format="parquet", flush_rows=1)
+
+    logger.log([{"a": 1.0, "b": "x"}], f"{stem}.csv")
+    logger.log([{"a": "not a number", "b": "y"}], f"{stem}.csv")
+    logger.log([{"a": 2.0, "b": "z"}], f"{stem}.csv")
+    logger.close()
+
+    assert logger.dropped_rows == {f"{stem}.csv": 1}
+    rows = [
+        row
+        for part in sorted(tmp_path.glob("log-*.parquet"))
+        for row in pq.read_table(part).to_pylist()
+    ]
+    assert rows == [{"a": 1.0, "b": "x"}, {"a": 2.0, "b": "z"}]
@@ -1,10 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException
-import os, time, requests
+import os, time, requests, threading, asyncio, multiprocessing
+import fcntl, hashlib, shutil, tempfile
 import numpy as np
 import cv2
 
-app = FastAPI()
-
 MODEL_DEPOT_URL = os.getenv(
     "MODEL_DEPOT_URL", "http://s2-modeldepot.default.svc.cluster.local"
 )
@@ -14,37 +15,162 @@ SHARED_MODEL_PATH = os.getenv("SHARED_MODEL_DIR", "/mnt/shared-models")
 MODEL_CFG = os.path.join(TMP_MODEL_DIR, "yolov4-tiny.cfg")
 MODEL_WEIGHTS = os.path.join(TMP_MODEL_DIR, "yolov4-tiny.weights")
 MODEL_CLASSES = os.path.join(TMP_MODEL_DIR, "coco.names")
+MODEL_FILES = ["yolov4-tiny.cfg", "yolov4-tiny.weights", "coco.names"]
+
+# Fetched files are stored once under objects/<sha256>; the paths above are
+# symlinks into it. A file lock serializes fetches, loads and reloads across
+# worker processes.
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/tmp/model-cache")
+COPY_CHUNK_SIZE = 1024 * 1024
+DIGEST_HEADER = "X-Content-SHA256"
+
+# Micro-batching: images from concurrent requests share one forward pass
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 8))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", 10))  # latency budget
+
+# Forward passes run off the event loop: "thread" shares one model and runs one
+# batch at a time (OpenCV parallelizes inside forward), "process" keeps a model
+# copy per worker process and runs up to INFER_WORKERS batches in parallel.
+INFER_EXECUTOR = os.getenv("INFER_EXECUTOR", "thread")
+INFER_WORKERS = int(os.getenv("INFER_WORKERS", os.cpu_count() or 1))
+INFER_MAX_PENDING = int(os.getenv("INFER_MAX_PENDING", 64))  # then 429
+
+# Detection decoding; INPUT_SIZE must be a multiple of 32 for YOLO
+CONF_THRESHOLD = float(os.getenv("CONF_THRESHOLD", 0.5))
+NMS_THRESHOLD = float(os.getenv("NMS_THRESHOLD", 0.4))
+INPUT_SIZE = int(os.getenv("INPUT_SIZE", 416))
+
+# Network, output layers and classes, loaded once per process
+_model = None
+_model_lock = threading.Lock()
+
+MODEL_STATS = {
+    "model_loads": 0,
+    "cold_requests": 0,
+    "warm_requests": 0,
+    "cold_inference_seconds_total": 0.0,
+    "warm_inference_seconds_total": 0.0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+}
+
+
+def cache_object_path(digest: str) -> str:
+    return os.path.join(MODEL_CACHE_DIR, "objects", digest)
+
+
+def store_object(chunks, expected_digest: str = None):
+    """
+    Writes chunks to a temp file while hashing them, then renames it to its
+    content-addressed path. Returns (object_path, bytes_written).
+    """
+    objects_dir = os.path.join(MODEL_CACHE_DIR, "objects")
+    fd, tmp_path = tempfile.mkstemp(dir=objects_dir, suffix=".tmp")
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                if chunk:
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+        digest = sha256.hexdigest()
+        if expected_digest and digest != expected_digest:
+            raise RuntimeError(
+                f"Checksum mismatch: expected {expected_digest}, got {digest}"
+            )
+        object_path = cache_object_path(digest)
+        os.replace(tmp_path, object_path)
+        return object_path, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_chunks(f):
+    return iter(lambda: f.read(COPY_CHUNK_SIZE), b"")
+
+
+def link_model_file(object_path: str, local_path: str):
+    """Atomically points local_path at a cached object."""
+    tmp_link = f"{local_path}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(object_path, tmp_link)
+    os.replace(tmp_link, local_path)
+
+
+def fetch_model_file(file: str):
+    """
+    Returns (object_path, bytes_downloaded, hit) for one model file. The
+    depot's digest header is checked before downloading, so an object that
+    is already cached is reused without transferring the body.
+    """
+    pvc_path = os.path.join(SHARED_MODEL_PATH, file)
+    if os.path.exists(pvc_path):
+        with open(pvc_path, "rb") as src:
+            object_path, size = store_object(read_chunks(src))
+        return object_path, size, False
+
+    with requests.get(f"{MODEL_DEPOT_URL}/model/{file}", stream=True) as r:
+        if r.status_code != 200:
+            raise RuntimeError(f"Failed to fetch {file} from ModelDepot")
+
+        expected_digest = r.headers.get(DIGEST_HEADER)
+        if expected_digest and os.path.isfile(cache_object_path(expected_digest)):
+            return cache_object_path(expected_digest), 0, True
+
+        object_path, size = store_object(
+            r.iter_content(COPY_CHUNK_SIZE), expected_digest
+        )
+    return object_path, size, False
+
+
+@contextmanager
+def model_files_lock():
+    """
+    Exclusive lock over the model files shared by all threads and worker
+    processes. Not reentrant: flock locks each open of the file separately.
+    """
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(MODEL_CACHE_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def remove_model_files(purge: bool = False):
+    """Unlinks the model files, and the cached objects if purge; needs the lock."""
+    for file in MODEL_FILES:
+        path = os.path.join(TMP_MODEL_DIR, file)
+        if os.path.lexists(path):
+            os.remove(path)
+    if purge:
+        shutil.rmtree(os.path.join(MODEL_CACHE_DIR, "objects"), ignore_errors=True)
 
 
 def ensure_model_files():
+    """
+    Makes every model file available under TMP_MODEL_DIR; needs the lock.
+    Returns {"download_bytes", "cache_hits", "cache_misses"} for this call.
+    """
     os.makedirs(TMP_MODEL_DIR, exist_ok=True)
-    files = ["yolov4-tiny.cfg", "yolov4-tiny.weights", "coco.names"]
+    os.makedirs(os.path.join(MODEL_CACHE_DIR, "objects"), exist_ok=True)
+    result = {"download_bytes": 0, "cache_hits": 0, "cache_misses": 0}
 
-    total_download_size = 0  # total bytes fetched
-
-    for file in files:
+    for file in MODEL_FILES:
         local_path = os.path.join(TMP_MODEL_DIR, file)
         if os.path.isfile(local_path):
+            result["cache_hits"] += 1
             continue
 
-        pvc_path = os.path.join(SHARED_MODEL_PATH, file)
-        if os.path.exists(pvc_path):
-            with open(pvc_path, "rb") as src, open(local_path, "wb") as dst:
-                data = src.read()
-                total_download_size += len(data)
-                dst.write(data)
-
-        else:
-            r = requests.get(f"{MODEL_DEPOT_URL}/model/{file}", stream=True)
-            if r.status_code != 200:
-                raise RuntimeError(f"Failed to fetch {file} from ModelDepot")
-            with open(local_path, "wb") as f:
-                for chunk in r.iter_content(8192):
-                    if chunk:
-                        total_download_size += len(chunk)
-                        f.write(chunk)
+        object_path, size, hit = fetch_model_file(file)
+        link_model_file(object_path, local_path)
+        result["download_bytes"] += size
+        result["cache_hits" if hit else "cache_misses"] += 1
 
-    return total_download_size
+    return result
 
 
 def get_net():
@@ -63,64 +189,338 @@ def load_classes():
         return [line.strip() for line in f.readlines()]
 
 
-@app.post("/infer")
-async def infer(file: UploadFile = File(...)):
-    try:
-        start_total = time.time()
-        download_size = ensure_model_files()
-        fetch_duration = time.time() - start_total
+def load_model(reset: bool = False, purge: bool = False):
+    """
+    Fetches and reads the model under the file lock, so another process's
+    reload cannot swap files mid-read. reset drops the local files first.
+    """
+    start = time.time()
+    with model_files_lock():
+        if reset:
+            remove_model_files(purge)
+        fetch = ensure_model_files()
+        fetch_duration = time.time() - start
 
-        classes = load_classes()
         net, out_layers = get_net()
+        classes = load_classes()
 
-        image_np = np.frombuffer(await file.read(), np.uint8)
-        image = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-        if image is None:
-            raise ValueError("Image decode failed")
+    return {
+        "net": net,
+        "out_layers": out_layers,
+        "classes": classes,
+        "fetch_seconds": fetch_duration,
+        "download_bytes": fetch["download_bytes"],
+        "cache_hits": fetch["cache_hits"],
+        "cache_misses": fetch["cache_misses"],
+        "load_seconds": time.time() - start,
+    }
 
-        start_infer = time.time()
-        blob = cv2.dnn.blobFromImage(
-            image, 0.00392, (416, 416), swapRB=True, crop=False
-        )
-        net.setInput(blob)
-        detections = net.forward(out_layers)
 
+def get_model():
+    """
+    Returns (model, cold): the cached model, loading it on first use.
+    cold is True only for the request that performed the load.
+    """
+    global _model
+    if _model is not None:
+        return _model, False
+    with _model_lock:
+        if _model is None:
+            _model = load_model()
+            return _model, True
+    return _model, False
+
+
+def postprocess(outputs, width, height):
+    """
+    Decodes YOLO output rows (cx, cy, w, h, objectness, class scores...) for
+    one image into pixel boxes, then drops overlapping duplicates with NMS.
+    """
+    rows = np.concatenate([out.reshape(-1, out.shape[-1]) for out in outputs])
+    scores = rows[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(rows)), class_ids]
+
+    keep = confidences > CONF_THRESHOLD
+    rows, class_ids, confidences = rows[keep], class_ids[keep], confidences[keep]
+    if not len(rows):
+        return [], [], []
+
+    center_x, center_y, w, h = (
+        (rows[:, :4] * np.array([width, height, width, height])).astype(int).T
+    )
+    boxes = np.stack(
+        [(center_x - w / 2).astype(int), (center_y - h / 2).astype(int), w, h],
+        axis=1,
+    )
+
+    indices = cv2.dnn.NMSBoxes(
+        boxes.tolist(), confidences.tolist(), CONF_THRESHOLD, NMS_THRESHOLD
+    )
+    indices = np.asarray(indices, dtype=int).reshape(-1)
+
+    return (
+        boxes[indices].tolist(),
+        confidences[indices].tolist(),
+        class_ids[indices].tolist(),
+    )
+
+
+def decode_image(data: bytes):
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Image decode failed")
+    return image
+
+
+def detect_batch(images):
+    """
+    Runs one forward pass for a list of images in the calling thread or process.
+    Returns (results, model_info): per-image detections in input order, and
+    whether this call had to load the model first.
+    """
+    model, cold = get_model()
+    net, out_layers, classes = model["net"], model["out_layers"], model["classes"]
+
+    blob = cv2.dnn.blobFromImages(
+        images, 0.00392, (INPUT_SIZE, INPUT_SIZE), swapRB=True, crop=False
+    )
+    net.setInput(blob)
+    outputs = net.forward(out_layers)
+
+    # Each output is (rows, 85) for one image and (batch, rows, 85) for more
+    outputs = [out.reshape(len(images), -1, out.shape[-1]) for out in outputs]
+
+    results = []
+    for i, image in enumerate(images):
         height, width = image.shape[:2]
-        boxes, confidences, class_ids = [], [], []
-
-        for output in detections:
-            for detection in output:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                if confidence > 0.5:
-                    center_x, center_y, w, h = (
-                        detection[0:4] * np.array([width, height, width, height])
-                    ).astype("int")
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    boxes.append([x, y, int(w), int(h)])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
+        _, confidences, class_ids = postprocess(
+            [out[i] for out in outputs], width, height
+        )
+        results.append(
+            {
+                "detected_classes": (
+                    [classes[c] for c in class_ids] if class_ids else ["Unknown"]
+                ),
+                "confidences": [float(c) for c in confidences],
+                "class_ids": [int(c) for c in class_ids],
+            }
+        )
+
+    model_info = {
+        "cold": cold,
+        "fetch_seconds": model["fetch_seconds"] if cold else 0.0,
+        "download_bytes": model["download_bytes"] if cold else 0,
+        "cache_hits": model["cache_hits"] if cold else 0,
+        "cache_misses": model["cache_misses"] if cold else 0,
+        "load_seconds": model["load_seconds"] if cold else 0.0,
+    }
+    return results, model_info
+
+
+def create_executor():
+    if INFER_EXECUTOR == "process":
+        # Spawned workers import this module fresh and load their own model
+        return ProcessPoolExecutor(
+            max_workers=INFER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return ThreadPoolExecutor(max_workers=INFER_WORKERS)
+
+
+class MicroBatcher:
+    """
+    Queues decoded images from concurrent requests and runs them through
+    the network in batches of up to max_batch_size. A batch is dispatched
+    as soon as it is full or max_wait seconds after its first image arrived,
+    with up to max_inflight batches running on the executor at once.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait: float, max_inflight: int = 1):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_inflight = max_inflight
+        self.executor = None
+        self.queue = None
+        self.slots = None
+        self.task = None
+        self.batches = set()
+
+    def start(self, executor):
+        self.executor = executor
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.max_inflight)
+        self.task = asyncio.create_task(self._run())
+
+    def replace_executor(self, executor):
+        """Swaps in a new executor; batches already running finish on the old one."""
+        old, self.executor = self.executor, executor
+        if old is not None:
+            old.shutdown(wait=False)
+
+    async def stop(self):
+        tasks = [self.task, *self.batches] if self.task is not None else []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def submit(self, image):
+        """
+        Returns (result, model_info, batch_info) for one image.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, future, time.time()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self.slots.acquire()
+            batch = await self._collect()
+            task = asyncio.create_task(self._dispatch(batch))
+            self.batches.add(task)
+            task.add_done_callback(self.batches.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        images = [image for image, _, _ in batch]
+        start = time.time()
+        try:
+            results, model_info = await loop.run_in_executor(
+                self.executor, detect_batch, images
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.slots.release()
+        duration = time.time() - start
+
+        if model_info["cold"]:
+            MODEL_STATS["model_loads"] += 1
+            MODEL_STATS["cache_hits"] += model_info["cache_hits"]
+            MODEL_STATS["cache_misses"] += model_info["cache_misses"]
+        for (_, future, queued_at), result in zip(batch, results):
+            if not future.done():
+                batch_info = {
+                    "batch_size": len(batch),
+                    "queue_wait_seconds": start - queued_at,
+                    "batch_inference_seconds": duration,
+                }
+                future.set_result((result, model_info, batch_info))
+
+
+batcher = MicroBatcher(
+    MAX_BATCH_SIZE,
+    MAX_BATCH_WAIT_MS / 1000,
+    max_inflight=INFER_WORKERS if INFER_EXECUTOR == "process" else 1,
+)
+pending_requests = 0
+
+
+@asynccontextmanager
+async def lifespan(app):
+    batcher.start(create_executor())
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/reload")
+def reload_model(purge: bool = False):
+    """
+    Drops the local model files and loads a fresh copy, e.g. after the
+    depot publishes a new model. Requests in flight finish on the old one.
+    Unchanged files are reused from the cache unless purge is set.
+    """
+    global _model
+    with _model_lock:
+        if INFER_EXECUTOR == "process":
+            # Fetch once here; fresh worker processes load the new files
+            start = time.time()
+            with model_files_lock():
+                remove_model_files(purge)
+                info = ensure_model_files()
+            info["fetch_seconds"] = info["load_seconds"] = time.time() - start
+            batcher.replace_executor(create_executor())
+        else:
+            _model = info = load_model(reset=True, purge=purge)
+            MODEL_STATS["model_loads"] += 1
+        MODEL_STATS["cache_hits"] += info["cache_hits"]
+        MODEL_STATS["cache_misses"] += info["cache_misses"]
+    return {
+        "message": "Model reloaded",
+        "model_fetch_latency_seconds": info["fetch_seconds"],
+        "model_download_bytes": info["download_bytes"],
+        "model_cache_hits": info["cache_hits"],
+        "model_cache_misses": info["cache_misses"],
+        "model_load_seconds": info["load_seconds"],
+    }
+
+
+@app.get("/stats")
+def stats():
+    return {**MODEL_STATS, "pending_requests": pending_requests}
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok", "pending_requests": pending_requests}
+
+
+@app.post("/infer")
+async def infer(file: UploadFile = File(...)):
+    global pending_requests
+    if pending_requests >= INFER_MAX_PENDING:
+        raise HTTPException(status_code=429, detail="Inference queue is full")
+
+    pending_requests += 1
+    try:
+        data = await file.read()
+        image = await asyncio.to_thread(decode_image, data)
+
+        start_infer = time.time()
+        result, model, batch_info = await batcher.submit(image)
 
         infer_duration = time.time() - start_infer
-        detected_classes = [classes[i] for i in class_ids] if class_ids else ["Unknown"]
-        confidences = [float(c) for c in confidences]
-        class_ids = [int(cid) for cid in class_ids]
+        kind = "cold" if model["cold"] else "warm"
+        MODEL_STATS[f"{kind}_requests"] += 1
+        MODEL_STATS[f"{kind}_inference_seconds_total"] += infer_duration
 
         return {
-            "result": {
-                "detected_classes": detected_classes,
-                "confidences": confidences,
-                "class_ids": class_ids,
-            },
+            "result": result,
             "metrics": {
-                "model_fetch_latency_seconds": fetch_duration,
-                "model_download_bytes": download_size,
+                "model_cold_load": model["cold"],
+                "model_fetch_latency_seconds": model["fetch_seconds"],
+                "model_download_bytes": model["download_bytes"],
+                "model_load_seconds": model["load_seconds"],
                 "inference_duration_seconds": infer_duration,
-                "input_size_bytes": len(image_np),
+                "batch_size": batch_info["batch_size"],
+                "batch_queue_wait_seconds": batch_info["queue_wait_seconds"],
+                "batch_inference_seconds": batch_info["batch_inference_seconds"],
+                "input_size_bytes": len(data),
             },
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
+    finally:
+        pending_requests -= 1
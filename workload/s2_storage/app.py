@@ -1,31 +1,129 @@
 # modeldepot/app.py
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
-import os
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.responses import FileResponse, Response
+import hashlib, os, tempfile
 
 app = FastAPI()
 MODEL_DIR = os.getenv("MODEL_DIR", "./models")
+CHUNK_SIZE = 1024 * 1024
 
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# path -> (size, mtime_ns, sha256), so each model is hashed once per version
+_digests = {}
+
+
+def file_digest(path: str) -> str:
+    stat = os.stat(path)
+    cached = _digests.get(path)
+    if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    _digests[path] = (stat.st_size, stat.st_mtime_ns, sha256.hexdigest())
+    return _digests[path][2]
+
+
+def model_path(name: str) -> str:
+    """Maps a model name to its file, rejecting paths and hidden temp files."""
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid model name")
+    return os.path.join(MODEL_DIR, name)
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Conditional GET check; If-None-Match takes precedence over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
 
 @app.get("/model/{name}")
-async def get_model(name: str):
-    path = os.path.join(MODEL_DIR, name)
+def get_model(name: str, request: Request):
+    """
+    Serves a model file with a sha256 ETag. Range requests (including
+    If-Range) are handled by FileResponse, so clients can resume or fetch
+    chunks in parallel.
+    """
+    path = model_path(name)
     if not os.path.isfile(path):
         raise HTTPException(status_code=404, detail="Model not found")
 
-    return FileResponse(path, filename=name, media_type="application/octet-stream")
+    digest = file_digest(path)
+    mtime = os.stat(path).st_mtime
+    headers = {
+        "ETag": f'"{digest}"',
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": "no-cache",
+        "X-Content-SHA256": digest,
+    }
+    if is_not_modified(request, headers["ETag"], mtime):
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        path,
+        filename=name,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+@app.get("/manifest")
+def get_manifest():
+    models = []
+    for name in sorted(os.listdir(MODEL_DIR)):
+        path = os.path.join(MODEL_DIR, name)
+        if name.startswith(".") or not os.path.isfile(path):
+            continue
+        stat = os.stat(path)
+        models.append(
+            {
+                "name": name,
+                "size_bytes": stat.st_size,
+                "sha256": file_digest(path),
+                "last_modified": formatdate(stat.st_mtime, usegmt=True),
+            }
+        )
+    return {"models": models}
 
 
 @app.post("/upload")
 async def upload_model(file: UploadFile = File(...)):
-    dest_path = os.path.join(MODEL_DIR, file.filename)
-    with open(dest_path, "wb") as f:
-        contents = await file.read()
-        f.write(contents)
+    # Stream to a hidden temp file and rename, so readers never see a partial model
+    dest_path = model_path(file.filename)
+    fd, tmp_path = tempfile.mkstemp(dir=MODEL_DIR, prefix=".upload-")
+    sha256 = hashlib.sha256()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := await file.read(CHUNK_SIZE):
+                sha256.update(chunk)
+                f.write(chunk)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    stat = os.stat(dest_path)
+    _digests[dest_path] = (stat.st_size, stat.st_mtime_ns, sha256.hexdigest())
 
     return {
         "message": f"Model '{file.filename}' uploaded successfully",
-        "size_bytes": os.path.getsize(dest_path),
+        "size_bytes": stat.st_size,
+        "sha256": sha256.hexdigest(),
     }
@@ -1,34 +1,171 @@
 from fastapi import FastAPI, Request, HTTPException
-from typing import List, Dict
+import gzip
+import json
 import time
-import statistics
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 app = FastAPI()
 
+FIELDS = ["temperature", "humidity", "pressure"]
+
+
+def loads(body: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN tokens, which only the stdlib parser accepts
+    return json.loads(body)
+
+
+class UnsupportedEncoding(ValueError):
+    pass
+
+
+def decode_body(body: bytes, content_type: str, content_encoding: str):
+    """
+    Decompresses and parses a request body. Raises UnsupportedEncoding for
+    formats this instance cannot read, so senders can fall back to JSON.
+    """
+    if content_encoding == "gzip":
+        body = gzip.decompress(body)
+    elif content_encoding == "zstd" and zstandard is not None:
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif content_encoding not in ("", "identity"):
+        raise UnsupportedEncoding(f"Unsupported Content-Encoding: {content_encoding}")
+
+    if content_type in ("application/msgpack", "application/x-msgpack"):
+        if msgpack is None:
+            raise UnsupportedEncoding("msgpack is not installed")
+        return msgpack.unpackb(body)
+    if content_type in ("", "application/json"):
+        return loads(body)
+    raise UnsupportedEncoding(f"Unsupported Content-Type: {content_type}")
+
+
+def to_columns(data):
+    """
+    Accepts rows ([{"temperature": ..., "device_id": ...}, ...]) or columns
+    ({"temperature": [...], "device_id": [...]}). Returns (row_count, columns,
+    devices): float arrays per present field, NaN where a row lacks it, and
+    the device ids or None.
+    """
+    if isinstance(data, dict):
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns have different lengths")
+        row_count = lengths.pop() if lengths else 0
+        columns = {
+            field: np.asarray(data[field], dtype=float)
+            for field in FIELDS
+            if field in data
+        }
+        devices = data.get("device_id")
+    else:
+        row_count = len(data)
+        columns = {
+            field: np.array([row.get(field) for row in data], dtype=float)
+            for field in FIELDS
+            if any(field in row for row in data)
+        }
+        devices = (
+            [str(row.get("device_id", "")) for row in data]
+            if any("device_id" in row for row in data)
+            else None
+        )
+
+    if devices is not None:
+        devices = np.asarray(devices, dtype=str)
+    return row_count, columns, devices
+
+
+def rounded(value):
+    return round(float(value), 2)
+
+
+def field_stats(field: str, values: np.ndarray) -> dict:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {f"{field}_{stat}": None for stat in ("avg", "min", "max", "std")}
+    return {
+        f"{field}_avg": rounded(values.mean()),
+        f"{field}_min": rounded(values.min()),
+        f"{field}_max": rounded(values.max()),
+        f"{field}_std": rounded(values.std()),
+    }
+
+
+def device_stats(columns: dict, devices: np.ndarray) -> dict:
+    """Per-device row counts and field statistics, grouped with bincount."""
+    names, group = np.unique(devices, return_inverse=True)
+    n_groups = len(names)
+    stats = {
+        name: {"row_count": int(count)}
+        for name, count in zip(names, np.bincount(group, minlength=n_groups))
+    }
+
+    for field, values in columns.items():
+        present = ~np.isnan(values)
+        g, v = group[present], values[present]
+
+        count = np.bincount(g, minlength=n_groups)
+        mean = np.bincount(g, weights=v, minlength=n_groups) / np.maximum(count, 1)
+        var = np.bincount(g, weights=(v - mean[g]) ** 2, minlength=n_groups)
+        std = np.sqrt(var / np.maximum(count, 1))
+
+        low = np.full(n_groups, np.inf)
+        high = np.full(n_groups, -np.inf)
+        np.minimum.at(low, g, v)
+        np.maximum.at(high, g, v)
+
+        for i, name in enumerate(names):
+            has_values = count[i] > 0
+            stats[name].update(
+                {
+                    f"{field}_avg": rounded(mean[i]) if has_values else None,
+                    f"{field}_min": rounded(low[i]) if has_values else None,
+                    f"{field}_max": rounded(high[i]) if has_values else None,
+                    f"{field}_std": rounded(std[i]) if has_values else None,
+                }
+            )
+    return stats
+
 
 @app.post("/process")
 async def process_batch(request: Request):
     try:
         start = time.time()
-        data: List[Dict] = await request.json()
+        data = decode_body(
+            await request.body(),
+            request.headers.get("content-type", "").split(";")[0].strip(),
+            request.headers.get("content-encoding", "").strip(),
+        )
+        row_count, columns, devices = to_columns(data)
 
-        if not data:
+        if not row_count:
             raise ValueError("Empty batch")
 
-        temperatures = [row["temperature"] for row in data if "temperature" in row]
-        humidities = [row["humidity"] for row in data if "humidity" in row]
-        pressures = [row["pressure"] for row in data if "pressure" in row]
-
-        stats = {
-            "row_count": len(data),
-            "temperature_avg": (
-                round(statistics.mean(temperatures), 2) if temperatures else None
-            ),
-            "humidity_avg": (
-                round(statistics.mean(humidities), 2) if humidities else None
-            ),
-            "pressure_avg": round(statistics.mean(pressures), 2) if pressures else None,
-        }
+        stats = {"row_count": row_count}
+        for field in FIELDS:
+            values = columns.get(field, np.empty(0))
+            stats.update(field_stats(field, values))
+        if devices is not None:
+            stats["devices"] = device_stats(columns, devices)
 
         duration = time.time() - start
 
@@ -36,9 +173,11 @@ async def process_batch(request: Request):
             "summary": stats,
             "metrics": {
                 "batch_processing_seconds": duration,
-                "rows_processed": len(data),
+                "rows_processed": row_count,
             },
         }
 
+    except UnsupportedEncoding as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Processing failed: {str(e)}")
@@ -1,56 +1,281 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Query, HTTPException
 from typing import List
 from starlette.responses import Response
+from prometheus_client import Histogram, make_asgi_app
 import pandas as pd
-import requests
+import asyncio
+import gzip
+import httpx
+import json
 import time
 import os
 
-app = FastAPI()
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 CRUNCHER_URL = os.getenv(
     "CRUNCHER_URL", "http://s3-sensorcruncher.default.svc.cluster.local"
 )
 
+# Batches outstanding at once per upload; also the keep-alive pool size
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", 8))
+DISPATCH_TIMEOUT = float(os.getenv("DISPATCH_TIMEOUT", 5))
 
-@app.post("/upload")
-async def upload_csv(batch_size: int = Query(), file: UploadFile = File(...)):
+# Batch wire format: "json" (list of row objects, the original format),
+# "columnar" (JSON object of column arrays) or "msgpack" (columnar MessagePack),
+# optionally compressed with "gzip" or "zstd"
+WIRE_ENCODING = os.getenv("WIRE_ENCODING", "msgpack")
+WIRE_COMPRESSION = os.getenv("WIRE_COMPRESSION", "zstd")
+
+client: httpx.AsyncClient = None
+
+# Per-batch payload sizes: "uncompressed" is the serialized batch, "wire" the
+# body bytes actually transferred (after Content-Encoding)
+BYTE_BUCKETS = [2**i for i in range(8, 29, 2)]  # 256 B .. 256 MiB
+REQUEST_BYTES = Histogram(
+    "sensorflood_batch_request_bytes",
+    "Request body bytes per batch sent to the cruncher",
+    ["encoding", "compression", "form"],
+    buckets=BYTE_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "sensorflood_batch_response_bytes",
+    "Response body bytes per batch received from the cruncher",
+    ["form"],
+    buckets=BYTE_BUCKETS,
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global client
+    client = httpx.AsyncClient(
+        timeout=DISPATCH_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT
+        ),
+    )
+    yield
+    await client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.mount("/metrics", make_asgi_app())
+
+
+def encode_batch(df: pd.DataFrame, encoding: str, compression: str):
+    """
+    Serializes a batch once. Returns (body, headers, uncompressed_size),
+    degrading the format if a library is missing.
+    """
+    if encoding == "msgpack" and msgpack is None:
+        encoding = "columnar"
+    if compression == "zstd" and zstandard is None:
+        compression = "gzip"
+
+    if encoding == "json":
+        body = json.dumps(df.to_dict(orient="records")).encode("utf-8")
+        content_type = "application/json"
+    else:
+        columns = {column: df[column].tolist() for column in df.columns}
+        if encoding == "msgpack":
+            body = msgpack.packb(columns)
+            content_type = "application/msgpack"
+        else:
+            body = json.dumps(columns).encode("utf-8")
+            content_type = "application/json"
+
+    headers = {"Content-Type": content_type}
+    uncompressed_size = len(body)
+    if compression == "gzip":
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+        headers["Content-Encoding"] = "zstd"
+    return body, headers, uncompressed_size
+
+
+async def send_batch(df: pd.DataFrame, wire: dict) -> dict:
+    """
+    Sends one batch in the upload's wire format. If the cruncher cannot read
+    the format (415), the batch is resent as JSON and wire is switched to JSON
+    for the rest of the upload.
+    """
+    encoding, compression = wire["encoding"], wire["compression"]
+    body, headers, uncompressed_size = await asyncio.to_thread(
+        encode_batch, df, encoding, compression
+    )
+
+    start = time.time()
+    res = await client.post(f"{CRUNCHER_URL}/process", content=body, headers=headers)
+    latency = time.time() - start
+
+    sizes = {
+        "request_bytes": len(body),
+        "request_bytes_uncompressed": uncompressed_size,
+        "response_bytes": res.num_bytes_downloaded,
+        "response_bytes_uncompressed": len(res.content),
+    }
+    labels = {"encoding": encoding, "compression": compression}
+    REQUEST_BYTES.labels(**labels, form="wire").observe(sizes["request_bytes"])
+    REQUEST_BYTES.labels(**labels, form="uncompressed").observe(uncompressed_size)
+    RESPONSE_BYTES.labels(form="wire").observe(sizes["response_bytes"])
+    RESPONSE_BYTES.labels(form="uncompressed").observe(len(res.content))
+
+    # Only 415 means the format is unsupported; a 400 is bad data in any format
+    if res.status_code == 415 and encoding != "json":
+        print(
+            f"[SensorFlood] Cruncher cannot read {encoding}/{compression} "
+            f"({res.text}), using JSON"
+        )
+        wire.update(encoding="json", compression="none")
+        result = await send_batch(df, wire)
+        # The rejected attempt crossed the network too
+        for key, value in sizes.items():
+            result[key] += value
+        return result
+
+    if res.status_code != 200:
+        raise HTTPException(
+            status_code=502, detail="Failed to send batch to SensorCruncher"
+        )
+
+    return {"latency_seconds": latency, **sizes}
+
+
+async def dispatch_batches(batches, max_in_flight: int, wire: dict) -> List[dict]:
+    """
+    Sends batches from an async iterator with at most max_in_flight requests
+    outstanding; the next batch is only pulled once a slot is free.
+    Returns one result per batch in send order; the first failure cancels
+    the batches still in flight and is re-raised.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async def send(batch):
+        try:
+            return await send_batch(batch, wire)
+        finally:
+            slots.release()
+
+    tasks = []
     try:
-        start_time = time.time()
-        df = pd.read_csv(file.file)
-        total_rows = len(df)
-        batches_sent = 0
+        async with asyncio.TaskGroup() as group:
+            while True:
+                await slots.acquire()
+                try:
+                    batch = await anext(batches)
+                except StopAsyncIteration:
+                    slots.release()
+                    break
+                tasks.append(group.create_task(send(batch)))
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
 
-        total_request_bytes = 0
-        total_response_bytes = 0
+    return [task.result() for task in tasks]
 
-        for i in range(0, total_rows, batch_size):
-            batch = df.iloc[i : i + batch_size].to_dict(orient="records")
-            json_payload = str(batch).encode("utf-8")
-            total_request_bytes += len(json_payload)
 
-            res = requests.post(f"{CRUNCHER_URL}/process", json=batch, timeout=5)
-            total_response_bytes += len(res.content)
+async def read_batches(file, batch_size: int, stream: bool, counter: dict):
+    """
+    Yields DataFrame batches from the CSV upload. In stream mode each chunk is
+    parsed in a worker thread right before it is sent, so parsing overlaps
+    with batches in flight and memory stays around max_in_flight batches.
+    """
+    if stream:
+        reader = pd.read_csv(file, chunksize=batch_size)
 
-            if res.status_code != 200:
-                raise HTTPException(
-                    status_code=502, detail="Failed to send batch to SensorCruncher"
-                )
-            batches_sent += 1
+        try:
+            while (batch := await asyncio.to_thread(next, reader, None)) is not None:
+                if len(batch):  # a header-only file yields one empty chunk
+                    counter["rows"] += len(batch)
+                    yield batch
+        finally:
+            reader.close()
+    else:
+        df = pd.read_csv(file)
+        for i in range(0, len(df), batch_size):
+            batch = df.iloc[i : i + batch_size]
+            counter["rows"] += len(batch)
+            yield batch
+
+
+def latency_summary(latencies: List[float]) -> dict:
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+@app.post("/upload")
+async def upload_csv(
+    batch_size: int = Query(ge=1),
+    max_in_flight: int = Query(MAX_IN_FLIGHT, ge=1),
+    stream: bool = Query(True),
+    encoding: str = Query(WIRE_ENCODING, pattern="^(json|columnar|msgpack)$"),
+    compression: str = Query(WIRE_COMPRESSION, pattern="^(none|gzip|zstd)$"),
+    file: UploadFile = File(...),
+):
+    try:
+        start_time = time.time()
+        counter = {"rows": 0}
+        batches = read_batches(file.file, batch_size, stream, counter)
+        wire = {"encoding": encoding, "compression": compression}
+        results = await dispatch_batches(batches, max_in_flight, wire)
+        total_rows = counter["rows"]
 
         duration = time.time() - start_time
-        total_traffic_bytes = total_request_bytes + total_response_bytes
+        totals = {
+            key: sum(r[key] for r in results)
+            for key in (
+                "request_bytes",
+                "request_bytes_uncompressed",
+                "response_bytes",
+                "response_bytes_uncompressed",
+            )
+        }
+        total_traffic_bytes = totals["request_bytes"] + totals["response_bytes"]
 
         return {
             "message": "Upload and dispatch complete",
             "metrics": {
                 "batch_size": batch_size,
                 "rows_total": total_rows,
-                "batches_sent": batches_sent,
+                "batches_sent": len(results),
+                "max_in_flight": max_in_flight,
+                "stream": stream,
+                "encoding": wire["encoding"],
+                "compression": wire["compression"],
                 "dispatch_duration_seconds": duration,
+                "batch_latency_seconds": latency_summary(
+                    [r["latency_seconds"] for r in results]
+                ),
+                "total_request_bytes": totals["request_bytes"],
+                "total_request_bytes_uncompressed": totals[
+                    "request_bytes_uncompressed"
+                ],
+                "total_response_bytes": totals["response_bytes"],
+                "total_response_bytes_uncompressed": totals[
+                    "response_bytes_uncompressed"
+                ],
                 "total_traffic_bytes": total_traffic_bytes,
             },
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
@@ -1,19 +1,52 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Query, HTTPException
+from numpy.lib.stride_tricks import sliding_window_view
 from starlette.responses import JSONResponse
 import numpy as np
 import soundfile as sf
 import time
 import io
+import os
 
 app = FastAPI()
 
-FRAME_DURATION_MS = 20  # frame size for short-time analysis
+FRAME_DURATION_MS = float(os.getenv("FRAME_DURATION_MS", 20))  # analysis frame
+FRAME_OVERLAP = float(os.getenv("FRAME_OVERLAP", 0.0))  # fraction of a frame, < 1
 ENERGY_THRESHOLD = 0.01  # baseline energy threshold
 ZCR_THRESHOLD = 0.1  # zero-crossing rate threshold
+CHUNK_SAMPLES = 1 << 20  # frame samples squared at once, bounds memory with overlap
+
+
+def frame_features(signal: np.ndarray, frame_size: int, frame_stride: int):
+    """
+    RMS energy and zero-crossing rate per frame, for frames starting at
+    0, frame_stride, ... while the start is below len(signal) - frame_size.
+    """
+    frame_count = max(0, -(-(len(signal) - frame_size) // frame_stride))
+    if frame_count == 0:
+        return np.empty(0), np.empty(0)
+
+    # Frames are strided views; only a chunk of rows is materialized at a time
+    frames = sliding_window_view(signal, frame_size)[::frame_stride][:frame_count]
+    rows = max(1, CHUNK_SAMPLES // frame_size)
+    energy = np.empty(frame_count)
+    for i in range(0, frame_count, rows):
+        chunk = frames[i : i + rows]
+        energy[i : i + rows] = np.sqrt(np.mean(np.square(chunk), axis=1))
+
+    # Crossings between neighbouring samples, counted per frame via a prefix sum
+    crossings = np.concatenate(([0], np.cumsum((signal[:-1] * signal[1:]) < 0)))
+    starts = np.arange(frame_count) * frame_stride
+    zcr = (crossings[starts + frame_size - 1] - crossings[starts]) / frame_size
+
+    return energy, zcr
 
 
 @app.post("/audio")
-async def detect_presence(file: UploadFile = File(...)):
+async def detect_presence(
+    file: UploadFile = File(...),
+    frame_ms: float = Query(FRAME_DURATION_MS, gt=0),
+    overlap: float = Query(FRAME_OVERLAP, ge=0, lt=1),
+):
     try:
         start_time = time.time()
         data_bytes = await file.read()
@@ -24,29 +57,36 @@ async def detect_presence(file: UploadFile = File(...)):
             signal = signal.mean(axis=1)  # mono
 
         duration_sec = len(signal) / samplerate
-        frame_size = int((FRAME_DURATION_MS / 1000) * samplerate)
-        frame_stride = frame_size  # no overlap
+        frame_size = int((frame_ms / 1000) * samplerate)
+        frame_stride = max(1, round(frame_size * (1 - overlap)))
+        if frame_size < 2:
+            raise HTTPException(
+                status_code=400,
+                detail=f"frame_ms={frame_ms} is {frame_size} sample(s) at "
+                f"{samplerate} Hz, at least 2 are needed",
+            )
+        if len(signal) <= frame_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Audio has {len(signal)} samples, shorter than one "
+                f"{frame_size}-sample frame",
+            )
 
-        high_energy_frames = 0
-        zcr_total = []
-        energy_total = []
-
-        for i in range(0, len(signal) - frame_size, frame_stride):
-            frame = signal[i : i + frame_size]
-            energy = np.sqrt(np.mean(np.square(frame)))
-            zcr = ((frame[:-1] * frame[1:]) < 0).sum() / len(frame)
-
-            energy_total.append(energy)
-            zcr_total.append(zcr)
-
-            if energy > ENERGY_THRESHOLD and zcr > ZCR_THRESHOLD:
-                high_energy_frames += 1
+        energy_total, zcr_total = frame_features(signal, frame_size, frame_stride)
+        high_energy_frames = int(
+            np.count_nonzero(
+                (energy_total > ENERGY_THRESHOLD) & (zcr_total > ZCR_THRESHOLD)
+            )
+        )
 
         energy_avg = np.mean(energy_total)
         zcr_avg = np.mean(zcr_total)
-        presence = str(high_energy_frames > 3)  # heuristic
+        # More than 3 frames of active audio; counts stride samples per frame so
+        # overlapping frames do not inflate it
+        presence = str(high_energy_frames * frame_stride > 3 * frame_size)
 
-        confidence = min(1.0, (high_energy_frames * frame_size / len(signal)))
+        # New samples per frame is the stride, which equals frame_size without overlap
+        confidence = min(1.0, (high_energy_frames * frame_stride / len(signal)))
 
         processing_time = time.time() - start_time
 
@@ -61,10 +101,14 @@ async def detect_presence(file: UploadFile = File(...)):
                     "avg_zcr": round(zcr_avg, 4),
                     "active_frames": high_energy_frames,
                     "frame_count": len(energy_total),
+                    "frame_ms": frame_ms,
+                    "frame_overlap": overlap,
                 },
             }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=400, detail=f"Audio processing failed: {str(e)}"